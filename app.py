@@ -18,22 +18,50 @@
 
 from __future__ import annotations
 
+import asyncio
 import base64
+import hashlib
+from collections import Counter, defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait as wait_futures
+import itertools
 import json
 import random
 import re
 import textwrap
+import threading
+import time
+import zlib
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from functools import lru_cache, partial
+from html import escape as html_escape
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, Iterator, List, Optional, Tuple
 
-import pandas as pd
 import streamlit as st
 
+# pandas는 리포트 페이지에서만 쓰므로 함수 안에서 지연 import (랜딩/질문 페이지 콜드스타트 단축)
+if TYPE_CHECKING:
+    import pandas as pd
+
 # OpenAI
 try:
-    from openai import OpenAI
+    from openai import AsyncOpenAI
+except Exception:
+    AsyncOpenAI = None  # type: ignore
+
+# OpenAI 연결 재사용용 httpx 클라이언트 (h2가 설치돼 있으면 HTTP/2로 한 연결에 요청을 다중화)
+try:
+    import httpx
+    from openai import DefaultAsyncHttpxClient
 except Exception:
-    OpenAI = None  # type: ignore
+    httpx = None  # type: ignore
+    DefaultAsyncHttpxClient = None  # type: ignore
+try:
+    import h2  # noqa: F401  # pip install h2
+    HTTP2_AVAILABLE = True
+except Exception:
+    HTTP2_AVAILABLE = False
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Gemini
 try:
@@ -41,6 +69,24 @@ try:
 except Exception:
     genai = None  # type: ignore
 
+# zstandard (선택: 설치돼 있으면 보관용 원문을 zstd로, 없으면 표준 zlib으로 압축)
+try:
+    import zstandard as zstd  # pip install zstandard
+except Exception:
+    zstd = None  # type: ignore
+
+# MeCab-ko (선택: 설치돼 있으면 미러링 키워드를 형태소 분석 명사로, 없으면 정규식 토큰으로)
+try:
+    from mecab import MeCab  # pip install python-mecab-ko
+except Exception:
+    MeCab = None  # type: ignore
+
+# orjson (선택: 설치돼 있으면 LLM 응답 JSON 파싱/리포트 직렬화를 C 구현으로, 없으면 표준 json)
+try:
+    import orjson  # pip install orjson
+except Exception:
+    orjson = None  # type: ignore
+
 
 # =========================
 # Config
@@ -55,6 +101,40 @@ MODEL_FALLBACK = "gpt-4o-mini"
 GEMINI_MODEL_PRIMARY = "gemini-1.5-flash"
 GEMINI_MODEL_FALLBACK = "gemini-1.5-pro"
 
+# OpenAI 요청이 이 시간(초) 안에 끝나지 않으면 다음 순위 모델/API 요청을 동시에 시작
+OPENAI_HEDGE_DELAY_SEC = 8.0
+
+# OpenAI 동시 요청 수 / 분당 요청 수 상한 기본값 (st.secrets의 OPENAI_MAX_CONCURRENCY, OPENAI_MAX_RPM로 변경 가능)
+# - 여러 세션의 rerun이 한꺼번에 몰려 429 → 백오프 대기가 생기기 전에 미리 간격을 둠 (RPM 0이면 간격 제한 없음)
+OPENAI_MAX_CONCURRENCY = 8
+OPENAI_MAX_RPM = 500
+OPENAI_RPM_BURST = 20
+
+# 429/408/409/5xx/연결 오류일 때 SDK 자체 재시도 횟수 (지수 백오프 + 지터, Retry-After 헤더 우선)
+# - 재시도 대기 중에도 OPENAI_HEDGE_DELAY_SEC가 지나면 다음 순위 요청이 함께 시작되므로 사용자 대기는 늘지 않음
+OPENAI_MAX_RETRIES = 2
+
+# 리포트 배치 생성(Batch API, 비용 50%↓): 완료 기한 / 상태 자동 확인 간격(초) / 더 확인하지 않는 종료 상태
+# - checked_at은 조회가 끝난 뒤 기록되므로, 다음 자동 실행이 간격보다 조금 일찍 와도 건너뛰지 않도록 여유(초)를 둠
+REPORT_BATCH_WINDOW = "24h"
+REPORT_BATCH_POLL_SEC = 30
+REPORT_BATCH_POLL_SLACK_SEC = 5
+REPORT_BATCH_DONE = ("failed", "expired", "cancelled")
+
+# 온보딩/최종 리포트 LLM 응답 캐시 유지 시간(초) / 최대 보관 개수
+LLM_CACHE_TTL_SEC = 24 * 60 * 60
+LLM_CACHE_MAX_ENTRIES = 256
+
+# 디버그 로그는 덮어쓰지 않고 누적하되 최근 N줄만 보관
+DEBUG_LOG_MAX = 200
+
+# 스트리밍 미리보기: N개 조각마다 화면 갱신, 끝부분 N자만 표시
+STREAM_PREVIEW_EVERY = 20
+STREAM_PREVIEW_CHARS = 1500
+
+# 질문 스트리밍 중 앞부분이 N자 이상 쌓였는데 이전 질문과 비슷하면 끝까지 받지 않고 중단
+QUESTION_EARLY_STOP_CHARS = 24
+
 TOPIC_CATEGORIES = [
     ("🎓 학업/진로", "학업, 전공 선택, 진로 방향, 취업/이직, 목표 설정"),
     ("💼 커리어/일", "업무 선택, 프로젝트, 협업, 리더십, 커리어 성장"),
@@ -120,6 +200,18 @@ DECISION_TEMPLATES: Dict[str, str] = {
     ).strip(),
 }
 
+
+def _make_template_applier(tmpl: str) -> Callable[[str], str]:
+    def apply(prev: str) -> str:
+        prev = prev.strip()
+        return f"{prev}\n\n{tmpl}" if prev else tmpl
+
+    return apply
+
+
+# ✅ 결정 유형별 "기존 상황 설명 + 가이드" 합성 함수를 import 시 한 번만 만들어 둠
+_TEMPLATE_APPLIERS: Dict[str, Callable[[str], str]] = {k: _make_template_applier(v) for k, v in DECISION_TEMPLATES.items()}
+
 COACHES = [
     {
         "id": "logic",
@@ -160,6 +252,13 @@ COACHES = [
     },
 ]
 
+# 재실행(rerun)마다 다시 만들지 않도록 미리 계산해 두는 조회용 테이블
+TOPIC_CATEGORY_KEYS = tuple(c[0] for c in TOPIC_CATEGORIES)
+COACH_BY_ID: Dict[str, Dict[str, Any]] = {c["id"]: c for c in COACHES}
+COACH_INDEX_BY_ID: Dict[str, int] = {c["id"]: i for i, c in enumerate(COACHES)}
+COACH_IDS = tuple(COACH_BY_ID)
+COACH_LABEL_BY_ID: Dict[str, str] = {c["id"]: f"{c['name']} — {c['tagline']}" for c in COACHES}
+
 MIN_ANSWER_CHARS = 10
 
 CONFUSED_ANSWER_PATTERNS = [
@@ -180,6 +279,20 @@ SHORT_ANSWER_PATTERNS = [
     r"^몰라$",
 ]
 
+# 답변 판정용 패턴은 import 시 한 번만 컴파일 (리스트별로 하나의 alternation)
+_CONFUSED_ANSWER_RE = re.compile("|".join(f"(?:{p})" for p in CONFUSED_ANSWER_PATTERNS))
+_SHORT_ANSWER_RE = re.compile("|".join(f"(?:{p})" for p in SHORT_ANSWER_PATTERNS))
+_DIGIT_RE = re.compile(r"\d")
+_TIME_HINT_RE = re.compile(r"(이번\s*주|다음\s*주|이번\s*달|올해|내년|오늘|내일|어제|주말)")
+_OPTION_HINT_RE = re.compile(r"(A|B|C)\s*(안|을|를)?")
+_NONWORD_RE = re.compile(r"[^\w가-힣 ]")
+_SENTENCE_END_RE = re.compile(r"[.!?。\n]")
+_DIRECTIVE_HINT_RE = re.compile(r"(해야|하자|추천|정답|결론)")
+_SPECIFIC_HINT_RE = re.compile(r"(언제|얼마나|기간|기준|우선순위|예시|조건|범위|리스크|최악)")
+
+# ✅ 답변 기록은 필드별 병렬 리스트(SoA)로 보관: st.session_state.answers_q / answers_a / ...
+ANSWER_FIELDS = ("q", "a", "ts", "kind", "subkind", "main_index")
+
 # ✅ 토큰 비용 관리(요약 버퍼) 파라미터
 RECENT_QA_WINDOW = 4          # 프롬프트에 포함할 “최근 Q/A” 개수(3~4 권장)
 SUMMARY_UPDATE_EVERY = 3      # 메인 답변 N개마다 요약 버퍼 업데이트
@@ -210,62 +323,88 @@ def _pebble_svg(fill: str, shine: str, stroke: str = "#3a3a3a") -> str:
 """.strip()
 
 
-def pebble_svg_b64(progress_0_to_1: float, inactive: bool = False) -> str:
+def _pebble_b64(fill: str, shine: str) -> str:
+    return base64.b64encode(_pebble_svg(fill=fill, shine=shine).encode("utf-8")).decode("ascii")
+
+
+# 조약돌 이미지는 진행도 4단계 + 비활성 1개뿐이라 import 시 미리 인코딩해 둠
+_PEBBLE_B64_ACTIVE = tuple(
+    _pebble_b64(fill, shine)
+    for fill, shine in (
+        ("#5f6672", "#aab8ff"),  # p < 0.25
+        ("#707888", "#c8d3ff"),  # p < 0.5
+        ("#8892a6", "#e3e8ff"),  # p < 0.75
+        ("#a6b2c8", "#ffffff"),
+    )
+)
+_PEBBLE_B64_INACTIVE = _pebble_b64("#2f3136", "#6b6f7a")
+
+
+def _pebble_bucket(progress_0_to_1: float) -> int:
     p = max(0.0, min(1.0, float(progress_0_to_1)))
-    if inactive:
-        fill, shine = "#2f3136", "#6b6f7a"
-    else:
-        fill = "#5f6672" if p < 0.25 else "#707888" if p < 0.5 else "#8892a6" if p < 0.75 else "#a6b2c8"
-        shine = "#aab8ff" if p < 0.25 else "#c8d3ff" if p < 0.5 else "#e3e8ff" if p < 0.75 else "#ffffff"
-    svg = _pebble_svg(fill=fill, shine=shine)
-    return base64.b64encode(svg.encode("utf-8")).decode("ascii")
+    return 0 if p < 0.25 else 1 if p < 0.5 else 2 if p < 0.75 else 3
 
 
-def render_pebble_bridge(current_idx: int, total: int, labels: List[str]) -> None:
-    total = max(2, int(total))
-    current_idx = max(0, min(int(current_idx), total - 1))
-    left_pct = ((current_idx + 0.5) / total) * 100.0
+def pebble_svg_b64(progress_0_to_1: float, inactive: bool = False) -> str:
+    if inactive:
+        return _PEBBLE_B64_INACTIVE
+    return _PEBBLE_B64_ACTIVE[_pebble_bucket(progress_0_to_1)]
 
-    pebble_imgs = []
-    for i in range(total):
-        active = i <= current_idx
-        p = (i + 1) / total
-        b64 = pebble_svg_b64(p, inactive=not active)
-        pebble_imgs.append(b64)
 
-    html = """
+# 징검다리 진행 표시의 고정 CSS (조약돌 이미지 5종은 클래스 배경으로 한 번만 싣고, 칸마다 base64를 반복하지 않음)
+_PEBBLE_BRIDGE_CSS = (
+    """
 <style>
 .pebble-bridge-wrap{ position: relative; width: 100%; margin: 6px 0 2px 0; padding: 16px 4px 0 4px;}
 .pebble-row{ display:flex; gap:10px; align-items:flex-end; justify-content:space-between;}
 .pebble-cell{ flex:1; min-width:0; text-align:center;}
-.pebble-img{ width:100%; max-width:120px; height:auto; display:inline-block;}
+.pebble-img{ width:100%; max-width:120px; aspect-ratio:4/3; display:inline-block; background:center/contain no-repeat;}
 .pebble-label{ font-size:12px; margin-top:4px; opacity:0.85; white-space:nowrap; overflow:hidden; text-overflow:ellipsis;}
-.walker{ position:absolute; top:-10px; left: VAR_LEFT%; transform: translateX(-50%) scaleX(-1); font-size:40px; line-height:1;
+.walker{ position:absolute; top:-10px; transform: translateX(-50%) scaleX(-1); font-size:40px; line-height:1;
   transition:left 520ms cubic-bezier(.2,.9,.2,1); filter: drop-shadow(0px 2px 2px rgba(0,0,0,0.25)); animation:bob 800ms ease-in-out infinite; user-select:none;}
 @keyframes bob{0%{ transform: translateX(-50%) translateY(0px) scaleX(-1);} 50%{ transform: translateX(-50%) translateY(-3px) scaleX(-1);} 100%{ transform: translateX(-50%) translateY(0px) scaleX(-1);} }
-</style>
+""".strip()
+    + "".join(
+        f"\n.pebble-v{i}{{ background-image:url(data:image/svg+xml;base64,{b64});}}" for i, b64 in enumerate(_PEBBLE_B64_ACTIVE)
+    )
+    + f"\n.pebble-off{{ background-image:url(data:image/svg+xml;base64,{_PEBBLE_B64_INACTIVE});}}\n</style>"
+)
+
+_PEBBLE_BRIDGE_TMPL = """
 <div class="pebble-bridge-wrap">
-  <div class="walker">🚶</div>
+  <div class="walker" style="left:{left:.3f}%">🚶</div>
   <div class="pebble-row">
-    VAR_PEBBLES
+    {cells}
   </div>
 </div>
 """.strip()
 
+
+@lru_cache(maxsize=64)
+def _pebble_bridge_html(current_idx: int, total: int, labels: Tuple[str, ...]) -> str:
+    left_pct = ((current_idx + 0.5) / total) * 100.0
+
     pebble_cells = []
     for i in range(total):
-        opacity = "1.0" if i <= current_idx else "0.55"
-        cell = f"""
-<div class="pebble-cell" style="opacity:{opacity}">
-  <img class="pebble-img" src="data:image/svg+xml;base64,{pebble_imgs[i]}" />
-  <div class="pebble-label">{labels[i] if i < len(labels) else ""}</div>
-</div>
-""".strip()
-        pebble_cells.append(cell)
+        active = i <= current_idx
+        variant = f"pebble-v{_pebble_bucket((i + 1) / total)}" if active else "pebble-off"
+        opacity = "1.0" if active else "0.55"
+        pebble_cells.append(
+            f'<div class="pebble-cell" style="opacity:{opacity}">'
+            f'<div class="pebble-img {variant}"></div>'
+            f'<div class="pebble-label">{labels[i] if i < len(labels) else ""}</div>'
+            "</div>"
+        )
 
-    html = html.replace("VAR_LEFT", f"{left_pct:.3f}")
-    html = html.replace("VAR_PEBBLES", "\n".join(pebble_cells))
-    st.markdown(html, unsafe_allow_html=True)
+    body = _PEBBLE_BRIDGE_TMPL.format(left=left_pct, cells="\n".join(pebble_cells))
+    return _PEBBLE_BRIDGE_CSS + "\n" + body
+
+
+def render_pebble_bridge(current_idx: int, total: int, labels: List[str]) -> None:
+    total = max(2, int(total))
+    current_idx = max(0, min(int(current_idx), total - 1))
+    # 같은 단계에서 위젯만 조작하는 rerun은 진행도/라벨이 그대로이므로 만들어 둔 HTML을 재사용
+    st.markdown(_pebble_bridge_html(current_idx, total, tuple(labels)), unsafe_allow_html=True)
 
 
 def render_hero_pebble(progress: float, label: str) -> None:
@@ -304,10 +443,82 @@ def get_gemini_api_key() -> str:
     return str(st.session_state.get("gemini_api_key_input", "")).strip()
 
 
-def get_openai_client(api_key: str) -> "OpenAI":
-    if OpenAI is None:
+@st.cache_resource(show_spinner=False)
+def _openai_loop() -> asyncio.AbstractEventLoop:
+    """
+    OpenAI 호출 전용 이벤트 루프(백그라운드 스레드 1개, 세션 간 공유)
+    - 호출마다 asyncio.run으로 새 루프를 만들면 루프에 묶인 httpx 연결 풀을 다음 호출에서 쓸 수 없어
+      매번 TCP/TLS 연결을 새로 맺게 되므로, 루프를 하나 띄워 두고 모든 호출을 여기서 실행
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="openai-loop", daemon=True).start()
+    return loop
+
+
+def run_on_openai_loop(coro: Any) -> Any:
+    return asyncio.run_coroutine_threadsafe(coro, _openai_loop()).result()
+
+
+def _secret_int(name: str, default: int) -> int:
+    try:
+        return int(st.secrets.get(name, default))  # type: ignore
+    except Exception:
+        return default
+
+
+class _OpenAIThrottle:
+    """
+    동시 요청 수(세마포어) + 분당 요청 수(GCRA 방식 토큰 버킷, 최대 burst개까지 즉시 허용)
+    - openai-loop 한 스레드에서만 쓰이므로 별도 락 없이 상태를 갱신
+    """
+
+    def __init__(self, concurrency: int, rpm: int, burst: int) -> None:
+        self.sem = asyncio.Semaphore(max(1, concurrency))
+        self.interval = 60.0 / rpm if rpm > 0 else 0.0
+        self.tolerance = self.interval * max(0, burst - 1)
+        self.tat = 0.0  # 다음 요청의 이론적 도착 시각
+
+    async def __aenter__(self) -> None:
+        await self.sem.acquire()
+        if not self.interval:
+            return
+        now = time.monotonic()
+        self.tat = max(self.tat, now)
+        wait = self.tat - self.tolerance - now
+        self.tat += self.interval
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.sem.release()
+                raise
+
+    async def __aexit__(self, *exc: Any) -> None:
+        self.sem.release()
+
+
+@st.cache_resource(show_spinner=False)
+def _openai_throttle() -> _OpenAIThrottle:
+    # 세션 간 공유 (모든 OpenAI 호출이 같은 openai-loop에서 실행되므로 프로세스 전체 상한이 됨)
+    return _OpenAIThrottle(
+        _secret_int("OPENAI_MAX_CONCURRENCY", OPENAI_MAX_CONCURRENCY),
+        _secret_int("OPENAI_MAX_RPM", OPENAI_MAX_RPM),
+        OPENAI_RPM_BURST,
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_openai_client(api_key: str) -> "AsyncOpenAI":
+    # 키마다 클라이언트(=연결 풀) 하나를 만들어 재실행/세션 간에 재사용 (keep-alive로 핸드셰이크 생략)
+    if AsyncOpenAI is None:
         raise RuntimeError("openai 패키지가 설치되어 있지 않습니다. `pip install openai`를 실행하세요.")
-    return OpenAI(api_key=api_key)
+    if DefaultAsyncHttpxClient is None:
+        return AsyncOpenAI(api_key=api_key, max_retries=OPENAI_MAX_RETRIES)
+    http_client = DefaultAsyncHttpxClient(
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60),
+    )
+    return AsyncOpenAI(api_key=api_key, http_client=http_client, max_retries=OPENAI_MAX_RETRIES)
 
 
 def _gemini_configure(api_key: str) -> None:
@@ -382,26 +593,245 @@ def _score_question_candidate(text: str) -> float:
         score -= 1.0
 
     # 지시/추천 뉘앙스 약간 감점(강하게 막는 건 별도 패턴에서)
-    if re.search(r"(해야|하자|추천|정답|결론)", t):
+    if _DIRECTIVE_HINT_RE.search(t):
         score -= 2.5
 
     # 숫자/범위/기간/기준을 묻는 느낌이면 가산
-    if re.search(r"(언제|얼마나|기간|기준|우선순위|예시|조건|범위|리스크|최악)", t):
+    if _SPECIFIC_HINT_RE.search(t):
         score += 0.7
 
     return score
 
 
+def _responses_output_text(resp: Any) -> str:
+    if getattr(resp, "output_text", None):
+        return str(resp.output_text).strip()
+    out_texts: List[str] = []
+    for item in getattr(resp, "output", []) or []:
+        for c in getattr(item, "content", []) or []:
+            if getattr(c, "type", None) == "output_text":
+                out_texts.append(getattr(c, "text", ""))
+    return "\n".join([t for t in out_texts if t]).strip()
+
+
+def _stream_delta_text(api: str, chunk: Any) -> str:
+    if api == "responses":
+        if getattr(chunk, "type", None) == "response.output_text.delta":
+            return getattr(chunk, "delta", "") or ""
+        return ""
+    choices = getattr(chunk, "choices", None) or []
+    if not choices:
+        return ""
+    return getattr(choices[0].delta, "content", None) or ""
+
+
+async def _collect_stream(stream: Any, api: str, on_delta: Callable[[str], Optional[bool]]) -> str:
+    """on_delta가 True를 반환하면 스트림을 닫고 그때까지 받은 앞부분만 반환"""
+    parts: List[str] = []
+    async for chunk in stream:
+        piece = _stream_delta_text(api, chunk)
+        if piece:
+            parts.append(piece)
+            if len(parts) % STREAM_PREVIEW_EVERY == 0 and on_delta("".join(parts)):
+                closed = stream.close()
+                if asyncio.iscoroutine(closed):
+                    await closed
+                break
+    return "".join(parts).strip()
+
+
+async def _try_openai_once(
+    client: "AsyncOpenAI",
+    api: str,  # "responses" | "chat"
+    model: str,
+    system: str,
+    user: str,
+    temperature: float,
+    debug: List[str],
+    on_delta: Optional[Callable[[str], Optional[bool]]] = None,
+    json_schema: Optional[Dict[str, Any]] = None,
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    on_delta가 있으면 stream=True로 받아 중간 텍스트를 넘겨줌(미리보기/조기 중단용)
+    json_schema({"name", "schema", "strict"})가 있으면 Structured Outputs로 스키마에 맞는 JSON만 생성하게 함
+    """
+    stream = on_delta is not None
+    try:
+        if api == "responses":
+            debug.append(f"OpenAI Responses API / model={model}" + (" / stream" if stream else ""))
+            fmt = {"text": {"format": {"type": "json_schema", **json_schema}}} if json_schema else {}
+            resp = await client.responses.create(
+                model=model,
+                input=[
+                    {"role": "system", "content": [{"type": "text", "text": system}]},
+                    {"role": "user", "content": [{"type": "text", "text": user}]},
+                ],
+                temperature=temperature,
+                stream=stream,
+                **fmt,
+            )
+            txt = await _collect_stream(resp, api, on_delta) if on_delta else _responses_output_text(resp)
+            if txt:
+                return txt, None
+            raise RuntimeError("응답 텍스트 추출 실패")
+
+        debug.append(f"OpenAI Chat Completions / model={model}" + (" / stream" if stream else ""))
+        fmt = {"response_format": {"type": "json_schema", "json_schema": json_schema}} if json_schema else {}
+        cc = await client.chat.completions.create(
+            model=model,
+            messages=[{"role": "system", "content": system}, {"role": "user", "content": user}],
+            temperature=temperature,
+            stream=stream,
+            **fmt,
+        )
+        if on_delta:
+            txt = await _collect_stream(cc, api, on_delta)
+        else:
+            txt = (cc.choices[0].message.content or "").strip() if cc.choices else ""
+        if txt:
+            return txt, None
+        raise RuntimeError("빈 응답")
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        label = "Responses" if api == "responses" else "Chat"
+        debug.append(f"OpenAI {label} failed: {type(e).__name__}: {e}")
+        return None, str(e)
+
+
+async def _race_openai(
+    client: "AsyncOpenAI",
+    throttle: _OpenAIThrottle,
+    system: str,
+    user: str,
+    temperature: float,
+    debug: List[str],
+    on_delta: Optional[Callable[[str], Optional[bool]]] = None,
+    json_schema: Optional[Dict[str, Any]] = None,
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    우선순위(Responses → Chat, primary → fallback) 순서로 시도하되,
+    앞 순위가 실패하면 즉시, 응답이 OPENAI_HEDGE_DELAY_SEC 넘게 없으면 다음 순위를 동시에 시작.
+    먼저 성공한 응답을 채택하고 나머지는 취소. (모두 한꺼번에 보내면 매 호출 비용이 4배가 되므로 단계적으로)
+    - client/throttle은 st.cache_resource이므로 스크립트 스레드에서 꺼내 넘겨받음 (루프 스레드에는 실행 컨텍스트가 없음)
+    """
+    attempts = [("chat", MODEL_PRIMARY), ("chat", MODEL_FALLBACK)]
+    if hasattr(client, "responses"):
+        attempts = [("responses", MODEL_PRIMARY), ("responses", MODEL_FALLBACK)] + attempts
+    queue = iter(attempts)
+    running = set()
+    preview_owner: Dict[str, Tuple[str, str]] = {}
+
+    def preview_for(attempt: Tuple[str, str]) -> Optional[Callable[[str], Optional[bool]]]:
+        if on_delta is None:
+            return None
+
+        # 동시에 여러 요청이 스트리밍되더라도 미리보기는 먼저 말을 시작한 요청 하나만 보여줌
+        def _cb(text: str) -> Optional[bool]:
+            if preview_owner.setdefault("attempt", attempt) == attempt:
+                return on_delta(text)
+            return None
+
+        return _cb
+
+    async def attempt(api: str, model: str, cb: Optional[Callable[[str], Optional[bool]]]) -> Tuple[Optional[str], Optional[str]]:
+        # 스트리밍이 끝날 때까지 동시 요청 한 자리를 차지
+        async with throttle:
+            return await _try_openai_once(client, api, model, system, user, temperature, debug, cb, json_schema)
+
+    def launch() -> None:
+        nxt = next(queue, None)
+        if nxt is not None:
+            running.add(asyncio.ensure_future(attempt(nxt[0], nxt[1], preview_for(nxt))))
+
+    err: Optional[str] = None
+    launch()
+    try:
+        while running:
+            done, running = await asyncio.wait(running, timeout=OPENAI_HEDGE_DELAY_SEC, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                txt, e = t.result()
+                if txt:
+                    return txt, None
+                err = e
+            # done이 비어 있으면 hedge 시간 초과, 아니면 모두 실패한 것 → 그만큼 다음 순위 시작
+            for _ in range(len(done) or 1):
+                launch()
+        return None, err
+    finally:
+        for t in running:
+            t.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+
+async def _race_openai_logged(coro: Any, debug: List[str]) -> Tuple[Optional[str], Optional[str]]:
+    try:
+        return await coro
+    except Exception as e:
+        debug.append(f"OpenAI init/call error: {type(e).__name__}: {e}")
+        return None, str(e)
+
+
+def submit_openai_text(
+    api_key: str,
+    system: str,
+    user: str,
+    temperature: float,
+    debug: List[str],
+    on_delta: Optional[Callable[[str], Optional[bool]]] = None,
+    json_schema: Optional[Dict[str, Any]] = None,
+) -> "Future[Tuple[Optional[str], Optional[str]]]":
+    """
+    call_openai_text를 기다리지 않고 openai-loop에 올린 뒤 future를 돌려줌 (스크립트 스레드에서 호출)
+    - 작업 스레드를 거치지 않으므로 future.cancel()이 진행 중인 요청(asyncio 태스크)까지 취소함
+    """
+    ctx = get_script_run_ctx(suppress_warning=True)
+
+    # 콜백은 OpenAI 루프 스레드에서 불리므로, 화면 갱신이 이 세션으로 가도록 호출 직전에 실행 컨텍스트를 붙임
+    # (루프 스레드는 콜백을 하나씩 동기로 실행하므로 다른 세션과 섞이지 않음)
+    def _relay_with_ctx(text: str) -> Optional[bool]:
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return on_delta(text)  # type: ignore[misc]
+
+    relay = _relay_with_ctx if on_delta is not None and ctx is not None else on_delta
+    try:
+        client = get_openai_client(api_key)
+    except Exception as e:
+        debug.append(f"OpenAI init/call error: {type(e).__name__}: {e}")
+        failed: "Future[Tuple[Optional[str], Optional[str]]]" = Future()
+        failed.set_result((None, str(e)))
+        return failed
+    coro = _race_openai(client, _openai_throttle(), system, user, temperature, debug, relay, json_schema)
+    return asyncio.run_coroutine_threadsafe(_race_openai_logged(coro, debug), _openai_loop())
+
+
+def call_openai_text(
+    api_key: str,
+    system: str,
+    user: str,
+    temperature: float,
+    debug: List[str],
+    on_delta: Optional[Callable[[str], Optional[bool]]] = None,
+    json_schema: Optional[Dict[str, Any]] = None,
+) -> Tuple[Optional[str], Optional[str]]:
+    return submit_openai_text(api_key, system, user, temperature, debug, on_delta, json_schema).result()
+
+
 def call_llm_text(
     system: str,
     user: str,
     temperature: float = 0.6,
     purpose: str = "general",  # "question" | "summary" | "report" | "general"
+    on_delta: Optional[Callable[[str], Optional[bool]]] = None,
+    json_schema: Optional[Dict[str, Any]] = None,
 ) -> Tuple[Optional[str], Optional[str], List[str]]:
     """
     1) OpenAI 우선 시도 (키 있으면)
     2) OpenAI 실패 시 Gemini fallback (키 있으면)
     3) (질문 목적) Gemini 보조 사용 옵션: OpenAI 결과가 있어도 Gemini 후보를 추가 생성해 더 좋은 질문 선택
+    - on_delta: OpenAI 응답을 스트리밍으로 받으며 누적 텍스트를 넘겨받는 콜백(미리보기용)
+      True를 반환하면 스트림을 끊고 그때까지의 앞부분을 결과로 사용
+    - json_schema: OpenAI Structured Outputs 스키마(Gemini에는 적용하지 않음)
     """
     debug: List[str] = []
 
@@ -418,63 +848,7 @@ def call_llm_text(
     openai_err: Optional[str] = None
 
     if openai_key:
-        try:
-            client = get_openai_client(openai_key)
-            if hasattr(client, "responses"):
-                for model in [MODEL_PRIMARY, MODEL_FALLBACK]:
-                    try:
-                        debug.append(f"OpenAI Responses API / model={model}")
-                        resp = client.responses.create(
-                            model=model,
-                            input=[
-                                {"role": "system", "content": [{"type": "text", "text": system}]},
-                                {"role": "user", "content": [{"type": "text", "text": user}]},
-                            ],
-                            temperature=temperature,
-                        )
-                        if getattr(resp, "output_text", None):
-                            openai_text = str(resp.output_text).strip()
-                            openai_err = None
-                            break
-
-                        out_texts: List[str] = []
-                        for item in getattr(resp, "output", []) or []:
-                            for c in getattr(item, "content", []) or []:
-                                if getattr(c, "type", None) == "output_text":
-                                    out_texts.append(getattr(c, "text", ""))
-                        txt = "\n".join([t for t in out_texts if t]).strip()
-                        if txt:
-                            openai_text = txt
-                            openai_err = None
-                            break
-                        raise RuntimeError("응답 텍스트 추출 실패")
-                    except Exception as e:
-                        debug.append(f"OpenAI Responses failed: {type(e).__name__}: {e}")
-                        openai_err = str(e)
-
-            if not openai_text:
-                for model in [MODEL_PRIMARY, MODEL_FALLBACK]:
-                    try:
-                        debug.append(f"OpenAI Chat Completions / model={model}")
-                        cc = client.chat.completions.create(
-                            model=model,
-                            messages=[{"role": "system", "content": system}, {"role": "user", "content": user}],
-                            temperature=temperature,
-                        )
-                        txt = ""
-                        if cc.choices:
-                            txt = (cc.choices[0].message.content or "").strip()
-                        if txt:
-                            openai_text = txt
-                            openai_err = None
-                            break
-                        raise RuntimeError("빈 응답")
-                    except Exception as e:
-                        debug.append(f"OpenAI Chat failed: {type(e).__name__}: {e}")
-                        openai_err = str(e)
-        except Exception as e:
-            debug.append(f"OpenAI init/call error: {type(e).__name__}: {e}")
-            openai_err = str(e)
+        openai_text, openai_err = call_openai_text(openai_key, system, user, temperature, debug, on_delta, json_schema)
 
     # --- 2) Gemini fallback / boost ---
     gemini_text: Optional[str] = None
@@ -535,14 +909,96 @@ def call_llm_text(
     return None, (openai_err or gemini_err or "모델 호출에 실패했습니다. 디버그 로그를 확인하세요."), debug
 
 
+@st.cache_resource(show_spinner=False)
+def _llm_response_cache() -> Tuple[threading.Lock, Dict[str, Tuple[float, Tuple[Optional[str], Optional[str], List[str]]]]]:
+    """
+    세션 간 공유되는 LLM 응답 캐시 (key -> (저장 시각, 결과))
+    - st.cache_data는 함수 안의 화면 갱신을 재생(replay)하려 해서 스트리밍 미리보기와 함께 쓸 수 없어 직접 관리
+    """
+    return threading.Lock(), {}
+
+
+def call_llm_text_cached(
+    system: str,
+    user: str,
+    temperature: float = 0.6,
+    purpose: str = "general",
+    on_delta: Optional[Callable[[str], Optional[bool]]] = None,
+    json_schema: Optional[Dict[str, Any]] = None,
+) -> Tuple[Optional[str], Optional[str], List[str]]:
+    """
+    call_llm_text + 응답 캐시
+    - 같은 프롬프트/모델/API 키 조합이면 재실행(rerun) 사이에 네트워크 호출 없이 재사용 (LLM_CACHE_TTL_SEC 동안)
+    - 성공한 응답만 캐시 (실패/키 없음은 매번 다시 시도)
+    - 질문 생성처럼 매번 달라야 하는 호출에는 쓰지 않음
+    """
+    # 캐시는 세션 간 공유되므로 키 자체 대신 지문으로 구분(다른 키의 응답을 재사용하지 않도록)
+    models = (MODEL_PRIMARY, MODEL_FALLBACK, GEMINI_MODEL_PRIMARY, GEMINI_MODEL_FALLBACK)
+    key = hashlib.sha256(
+        json.dumps(
+            [system, user, temperature, purpose, get_openai_api_key(), get_gemini_api_key(), models, json_schema],
+            ensure_ascii=False,
+        ).encode("utf-8")
+    ).hexdigest()
+    lock, store = _llm_response_cache()
+    now = time.time()
+    with lock:
+        hit = store.get(key)
+    if hit is not None and now - hit[0] < LLM_CACHE_TTL_SEC:
+        text, err, dbg = hit[1]
+        return text, err, list(dbg)
+
+    text, err, dbg = call_llm_text(
+        system=system, user=user, temperature=temperature, purpose=purpose, on_delta=on_delta, json_schema=json_schema
+    )
+    if text:
+        with lock:
+            store.pop(key, None)
+            while len(store) >= LLM_CACHE_MAX_ENTRIES:
+                store.pop(next(iter(store)))  # 가장 오래된 항목부터 제거
+            store[key] = (now, (text, err, list(dbg)))
+    return text, err, dbg
+
+
 # =========================
 # State
 # =========================
+def insert_decision_template(decision_type: str) -> None:
+    apply = _TEMPLATE_APPLIERS.get(decision_type)
+    if apply:
+        st.session_state.situation = apply(st.session_state.situation or "")
+
+
+# ✅ 매 rerun마다 읽지 않는 큰 텍스트(리포트 원문 등)는 압축된 bytes로 세션에 보관
+_ZSTD_C = zstd.ZstdCompressor(level=3) if zstd is not None else None
+_ZSTD_D = zstd.ZstdDecompressor() if zstd is not None else None
+
+
+def pack_text(text: Optional[str]) -> Optional[bytes]:
+    if text is None:
+        return None
+    raw = text.encode("utf-8")
+    return _ZSTD_C.compress(raw) if _ZSTD_C is not None else zlib.compress(raw, 6)
+
+
+def unpack_text(blob: Optional[bytes]) -> Optional[str]:
+    if blob is None:
+        return None
+    raw = _ZSTD_D.decompress(blob) if _ZSTD_D is not None else zlib.decompress(blob)
+    return raw.decode("utf-8")
+
+
+def get_final_report_raw() -> Optional[str]:
+    return unpack_text(st.session_state.final_report_raw)
+
+
+def log_debug(dbg: List[str]) -> None:
+    # 호출마다 덮어쓰면 직전 호출 기록만 남으므로, 최근 DEBUG_LOG_MAX줄까지 이어 붙임
+    st.session_state.debug_log.extend(dbg)
+
+
 def coach_by_id(coach_id: str) -> Dict[str, Any]:
-    for c in COACHES:
-        if c["id"] == coach_id:
-            return c
-    return COACHES[0]
+    return COACH_BY_ID.get(coach_id, COACHES[0])
 
 
 def init_state() -> None:
@@ -572,8 +1028,13 @@ def init_state() -> None:
         st.session_state.q_index = 0
     if "questions" not in st.session_state:
         st.session_state.questions = []
-    if "answers" not in st.session_state:
-        st.session_state.answers = []
+    if "question_plan" not in st.session_state:
+        st.session_state.question_plan = []  # 코칭 시작 시 한 번에 받아 둔 메인 질문 초안
+    if "question_plan_pending" not in st.session_state:
+        st.session_state.question_plan_pending = None  # 백그라운드로 보낸 질문 목록 요청 (future, debug, n, start)
+    for f in ANSWER_FIELDS:
+        if f"answers_{f}" not in st.session_state:
+            st.session_state[f"answers_{f}"] = []
 
     if "probe_active" not in st.session_state:
         st.session_state.probe_active = False
@@ -584,8 +1045,8 @@ def init_state() -> None:
     if "probe_mode" not in st.session_state:
         st.session_state.probe_mode = ""
 
-    if "crosscheck_used_for" not in st.session_state:
-        st.session_state.crosscheck_used_for = []  # list[int]
+    if "crosscheck_used_mask" not in st.session_state:
+        st.session_state.crosscheck_used_mask = 0  # bit i = main_index i에서 이미 교차검증함
 
     if "final_report_json" not in st.session_state:
         st.session_state.final_report_json = None
@@ -620,7 +1081,7 @@ def init_state() -> None:
         st.session_state.mask_export = True
 
     if "debug_log" not in st.session_state:
-        st.session_state.debug_log = []
+        st.session_state.debug_log = deque(maxlen=DEBUG_LOG_MAX)
     if "openai_api_key_input" not in st.session_state:
         st.session_state.openai_api_key_input = ""
     if "gemini_api_key_input" not in st.session_state:
@@ -635,6 +1096,46 @@ def init_state() -> None:
     # ✅ Gemini 보조 사용 토글(기본값은 call_llm_text에서 question 목적일 때 키 존재 시 True로 처리)
     if "use_gemini_boost" not in st.session_state:
         st.session_state.use_gemini_boost = False
+    if "speculative_questions" not in st.session_state:
+        st.session_state.speculative_questions = False
+    if "report_via_batch" not in st.session_state:
+        st.session_state.report_via_batch = False
+    if "report_batch" not in st.session_state:
+        st.session_state.report_batch = None  # {"id", "system", "user", "status", "checked_at"}
+
+
+# 프로브(보충 질문) 상태 초기값: 여러 곳에서 4개 키를 한 번의 update로 되돌림
+PROBE_RESET: Dict[str, Any] = {"probe_active": False, "probe_question": "", "probe_for_index": None, "probe_mode": ""}
+
+
+def clear_probe() -> None:
+    st.session_state.update(PROBE_RESET)
+
+
+def flow_reset_values() -> Dict[str, Any]:
+    """질문/답변/리포트 진행 상태의 초기값 (리스트는 세션끼리 공유되지 않도록 호출마다 새로 만듦)"""
+    # 아직 도착하지 않은 질문 목록은 쓸 곳이 없어지므로 요청 자체를 취소
+    pending = st.session_state.get("question_plan_pending")
+    if pending is not None:
+        pending[0].cancel()
+    values: Dict[str, Any] = {
+        "q_index": 0,
+        "questions": [],
+        "question_plan": [],
+        "question_plan_pending": None,
+        **PROBE_RESET,
+        "crosscheck_used_mask": 0,
+        "final_report_json": None,
+        "final_report_raw": None,
+        "decision_matrix_df": None,
+        # ✅ 요약 버퍼 초기화
+        "summary_buffer": "",
+        "summarized_main_count": 0,
+        "report_batch": None,
+        "answer_history_html": None,
+    }
+    values.update({f"answers_{f}": [] for f in ANSWER_FIELDS})
+    return values
 
 
 def reset_flow(to_page: str = "landing", keep_problem: bool = False) -> None:
@@ -656,63 +1157,72 @@ def reset_flow(to_page: str = "landing", keep_problem: bool = False) -> None:
 
     st.session_state.num_questions = int(st.session_state.get("num_questions", 5))
 
-    st.session_state.q_index = 0
-    st.session_state.questions = []
-    st.session_state.answers = []
-    st.session_state.probe_active = False
-    st.session_state.probe_question = ""
-    st.session_state.probe_for_index = None
-    st.session_state.probe_mode = ""
-    st.session_state.crosscheck_used_for = []
-
-    st.session_state.final_report_json = None
-    st.session_state.final_report_raw = None
-    st.session_state.decision_matrix_df = None
+    st.session_state.update(flow_reset_values())
     st.session_state.report_just_entered = False
 
     st.session_state.emotion_pre = None
     st.session_state.emotion_post = None
 
-    st.session_state.debug_log = []
-
-    # ✅ 요약 버퍼 초기화
-    st.session_state.summary_buffer = ""
-    st.session_state.summarized_main_count = 0
+    st.session_state.debug_log = deque(maxlen=DEBUG_LOG_MAX)
 
 
 def add_answer(q: str, a: str, kind: str, main_index: int, subkind: str = "") -> None:
-    st.session_state.answers.append(
-        {
-            "q": q,
-            "a": a,
-            "ts": datetime.now().isoformat(timespec="seconds"),
-            "kind": kind,  # "main" | "probe"
-            "subkind": subkind,
-            "main_index": main_index,
-        }
-    )
+    st.session_state.answers_q.append(q)
+    st.session_state.answers_a.append(a)
+    st.session_state.answers_ts.append(int(time.time()))  # 표시할 때 format_ts로 변환
+    st.session_state.answers_kind.append(kind)  # "main" | "probe"
+    st.session_state.answers_subkind.append(subkind)
+    st.session_state.answers_main_index.append(main_index)
+    st.session_state.answer_history_html = None
+
+
+def format_ts(ts: Any) -> str:
+    # 예전 세션에 남아 있는 ISO 문자열은 그대로 통과
+    if isinstance(ts, int):
+        return datetime.fromtimestamp(ts).isoformat(timespec="seconds")
+    return str(ts)
+
+
+def answer_count() -> int:
+    return len(st.session_state.answers_q)
+
+
+def pop_answer() -> Dict[str, Any]:
+    st.session_state.answer_history_html = None
+    return {f: st.session_state[f"answers_{f}"].pop() for f in ANSWER_FIELDS}
+
+
+def answer_records(start: int = 0) -> List[Dict[str, Any]]:
+    """병렬 리스트를 dict 행으로 묶어 반환 (행 단위 접근이 필요한 곳용)"""
+    cols = [st.session_state[f"answers_{f}"][start:] for f in ANSWER_FIELDS]
+    return [dict(zip(ANSWER_FIELDS, row)) for row in zip(*cols)]
+
+
+def main_answer_records() -> List[Dict[str, Any]]:
+    return [
+        {"q": q, "a": a}
+        for q, a, k in zip(st.session_state.answers_q, st.session_state.answers_a, st.session_state.answers_kind)
+        if k == "main"
+    ]
 
 
 def main_answer_count() -> int:
-    return sum(1 for x in st.session_state.answers if x.get("kind") == "main")
+    return st.session_state.answers_kind.count("main")
 
 
 # =========================
 # Helpers
 # =========================
 def normalize(s: str) -> str:
-    s = (s or "").strip()
-    s = re.sub(r"\s+", " ", s)
-    return s
+    # 인자 없는 split은 앞뒤 공백 제거 + 연속 공백(유니코드 포함) 분리를 C에서 한 번에 처리
+    return " ".join((s or "").split())
+
 
+def _toks(s: str) -> FrozenSet[str]:
+    return frozenset(t for t in _NONWORD_RE.sub(" ", s).lower().split() if len(t) >= 2)
 
-def token_overlap(a: str, b: str) -> float:
-    def toks(s: str) -> set:
-        s = re.sub(r"[^\w가-힣 ]", " ", s)
-        s = re.sub(r"\s+", " ", s).strip().lower()
-        return set([t for t in s.split(" ") if len(t) >= 2])
 
-    ta, tb = toks(a), toks(b)
+def _overlap(ta: FrozenSet[str], tb: FrozenSet[str]) -> float:
     if not ta or not tb:
         return 0.0
     inter = len(ta & tb)
@@ -720,25 +1230,23 @@ def token_overlap(a: str, b: str) -> float:
     return inter / denom
 
 
+@lru_cache(maxsize=512)
+def _similarity_key(s: str) -> Tuple[str, FrozenSet[str]]:
+    """(정규화 문장, 토큰 집합) — 이전 질문들은 매 비교마다 다시 토큰화하지 않고 한 번만 계산"""
+    s0 = normalize(s)
+    return s0, _toks(s0)
+
+
 def is_similar(a: str, b: str) -> bool:
-    a0, b0 = normalize(a), normalize(b)
+    a0, ta = _similarity_key(a)
+    b0, tb = _similarity_key(b)
     if not a0 or not b0:
         return False
     if a0 == b0:
         return True
     if a0 in b0 or b0 in a0:
         return True
-    return token_overlap(a0, b0) >= 0.75
-
-
-def is_too_short_answer(ans: str) -> bool:
-    a = (ans or "").strip()
-    if len(a) < MIN_ANSWER_CHARS:
-        return True
-    for pat in SHORT_ANSWER_PATTERNS:
-        if re.search(pat, a):
-            return True
-    return False
+    return _overlap(ta, tb) >= 0.75
 
 
 def _has_meaningful_content(ans: str) -> bool:
@@ -746,11 +1254,11 @@ def _has_meaningful_content(ans: str) -> bool:
     if not a:
         return False
     signals = 0
-    if re.search(r"\d", a):
+    if _DIGIT_RE.search(a):
         signals += 1
-    if re.search(r"(이번\s*주|다음\s*주|이번\s*달|올해|내년|오늘|내일|어제|주말)", a):
+    if _TIME_HINT_RE.search(a):
         signals += 1
-    if re.search(r"(A|B|C)\s*(안|을|를)?", a):
+    if _OPTION_HINT_RE.search(a):
         signals += 1
     if len(a) >= 35:
         signals += 1
@@ -759,31 +1267,63 @@ def _has_meaningful_content(ans: str) -> bool:
     return signals >= 2
 
 
-def is_confused_answer(ans: str) -> bool:
+# classify_answer 결과 비트
+ANSWER_SHORT = 1  # 너무 짧거나 성의 없는 답변 → probe
+ANSWER_CONFUSED = 2  # "모르겠어요"류 + 구체 내용 없음 → reframe
+
+
+@lru_cache(maxsize=256)
+def classify_answer(ans: str) -> int:
+    """답변을 한 번 정리(strip)해 짧음/막힘 여부를 비트 조합(ANSWER_SHORT | ANSWER_CONFUSED)으로 반환"""
     a = (ans or "").strip()
     if not a:
-        return False
-    has_confused_kw = any(re.search(pat, a) for pat in CONFUSED_ANSWER_PATTERNS)
-    if not has_confused_kw:
-        return False
-    if is_too_short_answer(a):
-        return True
-    if not _has_meaningful_content(a):
-        return True
-    return False
+        return ANSWER_SHORT
+    flags = 0
+    if len(a) < MIN_ANSWER_CHARS or _SHORT_ANSWER_RE.search(a):
+        flags |= ANSWER_SHORT
+    if _CONFUSED_ANSWER_RE.search(a) and (flags & ANSWER_SHORT or not _has_meaningful_content(a)):
+        flags |= ANSWER_CONFUSED
+    return flags
+
+
+@lru_cache(maxsize=64)
+def _parse_options_raw(raw: str) -> Tuple[str, ...]:
+    return tuple(o for o in (x.strip() for x in raw.split(",")) if o)
 
 
 def parse_options() -> List[str]:
-    return [o.strip() for o in (st.session_state.options or "").split(",") if o.strip()]
+    # 옵션 문자열은 거의 바뀌지 않으므로 원문 기준으로 분리 결과를 재사용 (호출부가 고칠 수 있게 list로 반환)
+    return list(_parse_options_raw(st.session_state.options or ""))
+
+
+# ✅ 개인정보 마스킹 규칙: 단계별로 (그룹명, 패턴, 치환 문자열), 같은 단계 안에서는 앞 규칙이 우선
+# - 숫자 규칙의 \b는 이메일/링크 치환 결과를 기준으로 판단해야 하므로 단계를 나눔
+_PRIVACY_MASK_STAGES: Tuple[Tuple[Tuple[str, str, str], ...], ...] = (
+    (
+        ("email", r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", "[이메일]"),
+        ("url", r"https?://\S+", "[링크]"),
+    ),
+    (
+        ("number", r"\b\d{6,}\b", "[숫자]"),
+        ("date", r"\b\d{4}-\d{2}-\d{2}\b", "[날짜]"),
+        ("time", r"\b\d{1,2}:\d{2}(?::\d{2})?\b", "[시간]"),
+    ),
+)
+# 단계마다 이름 붙은 alternation 하나로 import 시 컴파일 → 규칙 5개를 텍스트 2회 스캔으로 처리
+_PRIVACY_MASK_RES = [
+    re.compile("|".join(f"(?P<{name}>{pat})" for name, pat, _ in stage)) for stage in _PRIVACY_MASK_STAGES
+]
+_PRIVACY_MASK_REPL = {name: repl for stage in _PRIVACY_MASK_STAGES for name, _, repl in stage}
+
+
+def _privacy_mask_repl(m: "re.Match[str]") -> str:
+    return _PRIVACY_MASK_REPL[m.lastgroup]
 
 
 def mask_text_for_privacy(text: str) -> str:
     t = text or ""
-    t = re.sub(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", "[이메일]", t)
-    t = re.sub(r"(https?://\S+)", "[링크]", t)
-    t = re.sub(r"\b\d{6,}\b", "[숫자]", t)
-    t = re.sub(r"\b\d{4}-\d{2}-\d{2}\b", "[날짜]", t)
-    t = re.sub(r"\b\d{1,2}:\d{2}(:\d{2})?\b", "[시간]", t)
+    for rx in _PRIVACY_MASK_RES:
+        t = rx.sub(_privacy_mask_repl, t)
     return t
 
 
@@ -814,19 +1354,35 @@ def extract_json_candidates(text: str) -> List[str]:
     return candidates
 
 
+def _json_loads(s: str) -> Any:
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
+
+
+def _json_dumps_pretty(obj: Any) -> str:
+    """json.dumps(obj, ensure_ascii=False, indent=2)와 같은 모양의 문자열"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+        except TypeError:
+            pass  # orjson이 못 다루는 값(64비트 초과 정수, 문자열이 아닌 키 등)은 표준 json으로
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+
 def safe_json_parse(text: str) -> Optional[Dict[str, Any]]:
     if not text:
         return None
     raw = text.strip()
     try:
-        obj = json.loads(raw)
+        obj = _json_loads(raw)
         if isinstance(obj, dict):
             return obj
     except Exception:
         pass
     for cand in extract_json_candidates(raw):
         try:
-            obj = json.loads(cand)
+            obj = _json_loads(cand)
             if isinstance(obj, dict):
                 return obj
         except Exception:
@@ -843,7 +1399,7 @@ def _summarize_fallback_rules(mains: List[Dict[str, Any]], limit_chars: int = 12
         a = normalize(str(qa.get("a", "")))
         if not a:
             continue
-        first = re.split(r"[.!?。\n]", a)[0].strip()
+        first = _SENTENCE_END_RE.split(a, maxsplit=1)[0].strip()
         if len(first) < 6:
             first = a[:60].strip()
         if first:
@@ -865,9 +1421,9 @@ def _summary_system_prompt() -> str:
 
 
 def _summary_user_prompt(existing_summary: str, new_mains: List[Dict[str, Any]]) -> str:
-    qa_text = ""
-    for i, qa in enumerate(new_mains, start=1):
-        qa_text += f"{i}) Q: {qa.get('q','')}\n   A: {qa.get('a','')}\n"
+    qa_text = "".join(
+        f"{i}) Q: {qa.get('q','')}\n   A: {qa.get('a','')}\n" for i, qa in enumerate(new_mains, start=1)
+    )
     return textwrap.dedent(
         f"""
         [기존 요약]
@@ -885,7 +1441,7 @@ def _summary_user_prompt(existing_summary: str, new_mains: List[Dict[str, Any]])
 
 
 def update_summary_buffer_if_needed() -> None:
-    mains = [x for x in st.session_state.answers if x.get("kind") == "main"]
+    mains = main_answer_records()
     mcount = len(mains)
     summarized = int(st.session_state.summarized_main_count or 0)
 
@@ -911,7 +1467,7 @@ def update_summary_buffer_if_needed() -> None:
     user = _summary_user_prompt(st.session_state.summary_buffer or "", new_chunk)
 
     txt, err, dbg = call_llm_text(system=system, user=user, temperature=0.2, purpose="summary")
-    st.session_state.debug_log = dbg
+    log_debug(dbg)
 
     if txt and txt.strip():
         merged = txt.strip()
@@ -933,10 +1489,9 @@ def build_context_block() -> str:
     opts = parse_options()
     opts_txt = "\n".join([f"- {o}" for o in opts]) if opts else "(미입력)"
 
-    tail = st.session_state.answers[-(RECENT_QA_WINDOW * 2) :]
-    tail = tail[-RECENT_QA_WINDOW:] if len(tail) > RECENT_QA_WINDOW else tail
+    tail = answer_records(start=-RECENT_QA_WINDOW)
 
-    hist = ""
+    hist_parts: List[str] = []
     for i, qa in enumerate(tail, start=1):
         tag = "PROBE" if qa.get("kind") == "probe" else "MAIN"
         sub = qa.get("subkind", "")
@@ -945,26 +1500,28 @@ def build_context_block() -> str:
         a_short = a.strip()
         if len(a_short) > 420:
             a_short = a_short[:420].rstrip() + "…"
-        hist += f"{i}) ({tag2}) Q: {qa.get('q','')}\n   A: {a_short}\n"
+        hist_parts.append(f"{i}) ({tag2}) Q: {qa.get('q','')}\n   A: {a_short}\n")
+    hist = "".join(hist_parts)
 
     summary = (st.session_state.summary_buffer or "").strip()
     summary_block = summary if summary else "(없음)"
+    hist_block = hist.rstrip() if hist.strip() else "(아직 없음)"
 
-    return textwrap.dedent(
-        f"""
-        [세션 시작 정보]
-        - 카테고리: {st.session_state.category}
-        - 결정 유형: {st.session_state.decision_type}
-        - 상황 설명: {st.session_state.situation or "(미입력)"}
-        - 원하는 목표: {st.session_state.goal or "(미입력)"}
-        - 고려 옵션(있다면): {opts_txt}
-
-        [요약 버퍼(이전 내용 압축)]
-        {summary_block}
-
-        [최근 Q/A(원문 일부)]
-        {hist if hist.strip() else "(아직 없음)"}
-        """
+    # 여러 줄 값(옵션/요약/Q&A)이 끼어들면 textwrap.dedent가 공통 들여쓰기를 못 찾아 아무것도 못 지우므로,
+    # 처음부터 들여쓰기 없이 조립
+    return (
+        "[세션 시작 정보]\n"
+        f"- 카테고리: {st.session_state.category}\n"
+        f"- 결정 유형: {st.session_state.decision_type}\n"
+        f"- 상황 설명: {st.session_state.situation or '(미입력)'}\n"
+        f"- 원하는 목표: {st.session_state.goal or '(미입력)'}\n"
+        f"- 고려 옵션(있다면): {opts_txt}\n"
+        "\n"
+        "[요약 버퍼(이전 내용 압축)]\n"
+        f"{summary_block}\n"
+        "\n"
+        "[최근 Q/A(원문 일부)]\n"
+        f"{hist_block}"
     ).strip()
 
 
@@ -981,7 +1538,7 @@ def system_prompt_for_onboarding() -> str:
 
 
 def user_prompt_for_onboarding(problem_text: str) -> str:
-    cats = [c[0] for c in TOPIC_CATEGORIES]
+    cats = list(TOPIC_CATEGORY_KEYS)
     coaches = [{"id": c["id"], "name": c["name"], "tagline": c["tagline"]} for c in COACHES]
     dtypes = DECISION_TYPES
     return textwrap.dedent(
@@ -1005,7 +1562,8 @@ def user_prompt_for_onboarding(problem_text: str) -> str:
           "recommended_coach_id": "string (logic|value|action)",
           "coach_reason": "string",
           "goal_draft": "string (초안, 지시/추천 금지)",
-          "options_hint": "string (질문형 힌트, 없으면 빈 문자열)"
+          "options_hint": "string (질문형 힌트, 없으면 빈 문자열)",
+          "first_question": "string (추천 코치 스타일로, 상황의 핵심을 더 구체화하는 첫 코칭 질문 1개)"
         }}
         """
     ).strip()
@@ -1042,10 +1600,14 @@ def onboarding_fallback(problem_text: str) -> Dict[str, Any]:
     }
 
 
-def generate_onboarding_recommendation(problem_text: str) -> Tuple[Optional[Dict[str, Any]], Optional[str], List[str], Optional[str]]:
+def generate_onboarding_recommendation(
+    problem_text: str, fresh: bool = False, on_delta: Optional[Callable[[str], None]] = None
+) -> Tuple[Optional[Dict[str, Any]], Optional[str], List[str], Optional[str]]:
     system = system_prompt_for_onboarding()
     user = user_prompt_for_onboarding(problem_text)
-    txt, err, dbg = call_llm_text(system=system, user=user, temperature=0.2, purpose="general")
+    # fresh=True(“다시 생성” 버튼)이면 캐시를 건너뛰고 새로 호출
+    call = call_llm_text if fresh else call_llm_text_cached
+    txt, err, dbg = call(system=system, user=user, temperature=0.2, purpose="general", on_delta=on_delta)
     if not txt:
         fb = onboarding_fallback(problem_text)
         dbg.append("Onboarding fallback used (no model output).")
@@ -1058,61 +1620,88 @@ def generate_onboarding_recommendation(problem_text: str) -> Tuple[Optional[Dict
     return data, None, dbg, txt
 
 
+def onboarding_first_question() -> str:
+    """
+    온보딩 응답에 함께 받아 둔 첫 질문 (질문 생성 호출 1회 절약)
+    - 질문 스타일이 코치별로 다르므로, 사용자가 추천 코치를 그대로 쓸 때만 사용
+    """
+    reco = st.session_state.onboarding_reco or {}
+    if reco.get("recommended_coach_id") != st.session_state.coach_id:
+        return ""
+    q = normalize(str(reco.get("first_question", "") or ""))
+    if not _looks_like_single_question(q) or contains_forbidden_recommendation(q):
+        return ""
+    return q
+
+
 # =========================
 # Question generation
 # =========================
-def system_prompt_for_questions(coach: Dict[str, Any]) -> str:
+def system_prompt_for_questions(coach: Dict[str, Any], output_rule: str = "출력: 질문 1개만.\n") -> str:
+    return _question_system_prompt(coach["id"], output_rule)
+
+
+@lru_cache(maxsize=None)
+def _question_system_prompt(coach_id: str, output_rule: str) -> str:
+    # 코치 id × 출력 규칙 조합마다 한 번만 만들어 두고, 질문/Probe마다 재사용
     base = (
         "당신은 'AI 결정 코칭 앱'의 질문 생성기입니다.\n"
         "정답/해결책/추천을 주지 말고, 사용자가 스스로 정리하도록 질문만 던지세요.\n"
         "금지: 결론, 추천, 선택 강요, 판단문, 지시문(해야 한다/하자).\n"
-        "출력: 질문 1개만.\n"
+        + output_rule
     )
-    if coach["id"] == "logic":
+    if coach_id == "logic":
         return base + "스타일: 구조화/기준/역발상 질문.\n"
-    if coach["id"] == "value":
+    if coach_id == "value":
         return base + "스타일: 감정 라벨링 + 감정/가치 분리 + 후회 최소화 질문.\n"
     return base + "스타일: If-Then/프리모템/우선순위/Quick Win을 질문으로만 유도.\n"
 
 
-def probing_instruction(last_q: str, last_a: str) -> str:
-    return textwrap.dedent(
-        f"""
-        사용자의 답변이 너무 짧거나 모호합니다.
-        직전 Q/A를 바탕으로 구체화를 돕는 추가 질문 1개(Probe)를 만들어 주세요.
+# 들여쓰기 제거는 모듈 로드 시 한 번만 하고, 호출마다 값만 채움
+# (값을 먼저 넣고 dedent하면 여러 줄 답변이 공통 들여쓰기를 깨뜨려 아무것도 못 지움)
+_PROBING_TEMPLATE = textwrap.dedent(
+    """
+    사용자의 답변이 너무 짧거나 모호합니다.
+    직전 Q/A를 바탕으로 구체화를 돕는 추가 질문 1개(Probe)를 만들어 주세요.
 
-        - 직전 질문: {last_q}
-        - 직전 답변: {last_a}
+    - 직전 질문: {last_q}
+    - 직전 답변: {last_a}
 
-        요구사항:
-        - 예시/상황/기준/이유/범위/기간/우선순위 중 하나를 더 묻기
-        - 판단/추천/지시 금지
-        - 질문 1개만 출력
-        """
-    ).strip()
+    요구사항:
+    - 예시/상황/기준/이유/범위/기간/우선순위 중 하나를 더 묻기
+    - 판단/추천/지시 금지
+    - 질문 1개만 출력
+    """
+).strip()
 
+_REFRAME_TEMPLATE = textwrap.dedent(
+    """
+    사용자가 "잘 모르겠어요/감이 안 와요/어려워요" 같은 반응을 보였습니다.
+    질문을 더 쉽게 풀어 쓰거나(재프레이밍), 더 답하기 쉬운 대체 질문 1개를 만들어 주세요.
 
-def reframe_instruction(last_q: str, last_a: str) -> str:
-    return textwrap.dedent(
-        f"""
-        사용자가 "잘 모르겠어요/감이 안 와요/어려워요" 같은 반응을 보였습니다.
-        질문을 더 쉽게 풀어 쓰거나(재프레이밍), 더 답하기 쉬운 대체 질문 1개를 만들어 주세요.
+    [사용자 상황 설명]
+    {situation}
 
-        [사용자 상황 설명]
-        {st.session_state.situation or "(미입력)"}
+    [직전 질문]
+    {last_q}
 
-        [직전 질문]
-        {last_q}
+    [사용자 답변]
+    {last_a}
 
-        [사용자 답변]
-        {last_a}
+    요구사항:
+    - 질문 1개만 출력
+    - 추천/지시/판단 금지
+    - 답하기 쉬운 형태(범위 좁히기/둘 중 무엇에 가까운지/예시 요구 등)
+    """
+).strip()
 
-        요구사항:
-        - 질문 1개만 출력
-        - 추천/지시/판단 금지
-        - 답하기 쉬운 형태(범위 좁히기/둘 중 무엇에 가까운지/예시 요구 등)
-        """
-    ).strip()
+
+def probing_instruction(last_q: str, last_a: str) -> str:
+    return _PROBING_TEMPLATE.format(last_q=last_q, last_a=last_a)
+
+
+def reframe_instruction(last_q: str, last_a: str) -> str:
+    return _REFRAME_TEMPLATE.format(situation=st.session_state.situation or "(미입력)", last_q=last_q, last_a=last_a)
 
 
 def crosscheck_system_prompt() -> str:
@@ -1124,48 +1713,43 @@ def crosscheck_system_prompt() -> str:
     )
 
 
-def crosscheck_user_prompt(current_main_index: int) -> str:
-    mains = [x for x in st.session_state.answers if x.get("kind") == "main"]
-    tail = mains[-6:]
-    qa = ""
-    for i, x in enumerate(tail, start=1):
-        qa += f"{i}) Q: {x['q']}\n   A: {x['a']}\n"
+_CROSSCHECK_HEAD = textwrap.dedent(
+    """
+    아래 답변들 사이에 기준/우선순위 상충이 있는지 판단하세요.
+    충돌이 있다면, 사용자가 스스로 정리하도록 돕는 질문 1개를 제안하세요.
+    충돌이 없다면 has_conflict=false.
 
-    return textwrap.dedent(
-        f"""
-        아래 답변들 사이에 기준/우선순위 상충이 있는지 판단하세요.
-        충돌이 있다면, 사용자가 스스로 정리하도록 돕는 질문 1개를 제안하세요.
-        충돌이 없다면 has_conflict=false.
+    [출력 JSON]
+    {
+      "has_conflict": true/false,
+      "conflict_summary": "string (없으면 빈 문자열)",
+      "question": "string (has_conflict=true일 때만, 질문 1개)"
+    }
+    """
+).strip()
 
-        [답변들]
-        {qa if qa.strip() else "(답변 없음)"}
 
-        [출력 JSON]
-        {{
-          "has_conflict": true/false,
-          "conflict_summary": "string (없으면 빈 문자열)",
-          "question": "string (has_conflict=true일 때만, 질문 1개)"
-        }}
+def crosscheck_user_prompt(current_main_index: int) -> str:
+    mains = main_answer_records()
+    tail = mains[-6:]
+    qa = "".join(f"{i}) Q: {x['q']}\n   A: {x['a']}\n" for i, x in enumerate(tail, start=1))
 
-        current_main_index={current_main_index}
-        """
-    ).strip()
+    # 고정 지시/출력 형식(_CROSSCHECK_HEAD)을 앞에 두고 답변만 뒤에 붙임 (프롬프트 캐시용)
+    return f"{_CROSSCHECK_HEAD}\n\n[답변들]\n{qa.rstrip() if qa.strip() else '(답변 없음)'}\n\ncurrent_main_index={current_main_index}"
 
 
-def try_logic_crosscheck_question(main_index: int) -> Tuple[Optional[str], List[str]]:
-    dbg: List[str] = []
-    used_set = set(int(x) for x in (st.session_state.crosscheck_used_for or []))
-    if main_index in used_set:
-        return None, dbg
+def crosscheck_prompts(main_index: int) -> Optional[Tuple[str, str]]:
+    """이번 단계에서 크로스체크를 할 차례면 (system, user), 아니면 None"""
+    if st.session_state.crosscheck_used_mask & (1 << main_index):
+        return None
+    if main_answer_count() < 2:
+        return None
+    return crosscheck_system_prompt(), crosscheck_user_prompt(main_index)
 
-    mains = [x for x in st.session_state.answers if x.get("kind") == "main"]
-    if len(mains) < 2:
-        return None, dbg
 
-    system = crosscheck_system_prompt()
-    user = crosscheck_user_prompt(main_index)
-    txt, err, d = call_llm_text(system=system, user=user, temperature=0.2, purpose="question")
-    dbg.extend(d)
+def crosscheck_result(
+    main_index: int, txt: Optional[str], err: Optional[str], dbg: List[str]
+) -> Tuple[Optional[str], List[str]]:
     if not txt:
         if err:
             dbg.append(f"Crosscheck error: {err}")
@@ -1179,8 +1763,7 @@ def try_logic_crosscheck_question(main_index: int) -> Tuple[Optional[str], List[
     has_conflict = bool(data.get("has_conflict", False))
     q = normalize(str(data.get("question", "") or ""))
 
-    used_set.add(main_index)
-    st.session_state.crosscheck_used_for = sorted(list(used_set))
+    st.session_state.crosscheck_used_mask |= 1 << main_index
 
     if has_conflict and q:
         dbg.append("Crosscheck conflict detected -> using conflict question.")
@@ -1190,38 +1773,74 @@ def try_logic_crosscheck_question(main_index: int) -> Tuple[Optional[str], List[
     return None, dbg
 
 
-def instruction_for_question(i: int, n: int, coach_id: str) -> str:
+def try_logic_crosscheck_question(main_index: int) -> Tuple[Optional[str], List[str]]:
+    prompts = crosscheck_prompts(main_index)
+    if prompts is None:
+        return None, []
+    txt, err, d = call_llm_text(
+        system=prompts[0], user=prompts[1], temperature=0.2, purpose="question", json_schema=CROSSCHECK_JSON_SCHEMA
+    )
+    return crosscheck_result(main_index, txt, err, d)
+
+
+_QUESTION_RULES = "규칙:\n- 결론/추천/정답/지시 금지\n- 질문 1개만 출력\n- 이전 질문과 너무 비슷하면 피하기"
+
+
+# 단계별 질문 목적 문구 (instruction_for_question이 단계/코치에 맞는 키를 고름)
+_QUESTION_PURPOSES: Dict[str, str] = {
+    "core": "상황의 핵심을 더 구체화하는 질문 1개",
+    "goal": "원하는 목표를 측정 가능한 형태로 정리하게 하는 질문 1개",
+    "action_last": "‘지금 앱을 끄고 5분 안에 할 수 있는 가장 작은 행동’을 스스로 적게 하는 질문 1개(추천 금지)",
+    "action_options": "옵션/해야 할 일 3~6개를 펼치고 Top1~3 우선순위를 정리하게 하는 질문(효과/중요도/난이도는 질문으로 제시)",
+    "action_premortem": "프리모템 + If-Then 트리거 설계 질문 1개",
+    "action_next": "다음 행동을 더 구체화하는 질문 1개",
+    "logic_criteria": "선택 기준(3~5)을 뽑게 하는 질문 1개",
+    "logic_last": "기준의 우선순위를 1~3위로 정리하게 하는 질문 1개",
+    "logic_clarify": "옵션/정보/제약을 분리해 명료화하는 질문 1개",
+    "value_feelings": "지금 감정 2~3개와 이유를 말하게 하는 질문 1개",
+    "value_regret": "후회 최소화(미래 관점) 질문 1개",
+    "value_last": "마지막으로 ‘내 기준’을 한 문장으로 정리하게 하는 질문 1개",
+    "value_top3": "가치 Top3를 정리하게 하는 질문 1개",
+    "default": "사용자가 스스로 정리하도록 돕는 질문 1개",
+}
+
+
+def _question_purpose_key(i: int, n: int, coach_id: str) -> str:
     if i == 0:
-        return "상황의 핵심을 더 구체화하는 질문 1개"
+        return "core"
     if i == 1:
-        return "원하는 목표를 측정 가능한 형태로 정리하게 하는 질문 1개"
+        return "goal"
 
     if coach_id == "action":
         if i == n - 1:
-            return "‘지금 앱을 끄고 5분 안에 할 수 있는 가장 작은 행동’을 스스로 적게 하는 질문 1개(추천 금지)"
+            return "action_last"
         if i == 2:
-            return "옵션/해야 할 일 3~6개를 펼치고 Top1~3 우선순위를 정리하게 하는 질문(효과/중요도/난이도는 질문으로 제시)"
+            return "action_options"
         if (n == 5 and i == 3) or (n >= 6 and i == n - 2):
-            return "프리모템 + If-Then 트리거 설계 질문 1개"
-        return "다음 행동을 더 구체화하는 질문 1개"
+            return "action_premortem"
+        return "action_next"
 
     if coach_id == "logic":
         if i == 2:
-            return "선택 기준(3~5)을 뽑게 하는 질문 1개"
+            return "logic_criteria"
         if i == n - 1:
-            return "기준의 우선순위를 1~3위로 정리하게 하는 질문 1개"
-        return "옵션/정보/제약을 분리해 명료화하는 질문 1개"
+            return "logic_last"
+        return "logic_clarify"
 
     if coach_id == "value":
         if i == 2:
-            return "지금 감정 2~3개와 이유를 말하게 하는 질문 1개"
+            return "value_feelings"
         if i == n - 2:
-            return "후회 최소화(미래 관점) 질문 1개"
+            return "value_regret"
         if i == n - 1:
-            return "마지막으로 ‘내 기준’을 한 문장으로 정리하게 하는 질문 1개"
-        return "가치 Top3를 정리하게 하는 질문 1개"
+            return "value_last"
+        return "value_top3"
+
+    return "default"
 
-    return "사용자가 스스로 정리하도록 돕는 질문 1개"
+
+def instruction_for_question(i: int, n: int, coach_id: str) -> str:
+    return _QUESTION_PURPOSES[_question_purpose_key(i, n, coach_id)]
 
 
 def fallback_question(coach_id: str, i: int, n: int) -> str:
@@ -1252,39 +1871,226 @@ def fallback_question(coach_id: str, i: int, n: int) -> str:
     return "이 고민에서 가장 중요한 가치 Top3는 무엇인가요?"
 
 
-def generate_question(i: int, n: int) -> Tuple[str, Optional[str], List[str]]:
+def question_plan_prompts(n: int, start: int = 0) -> Tuple[str, str]:
+    """start번 질문부터 n-1번까지의 질문 목록 요청 프롬프트 (앞 질문이 이미 있으면 그만큼 빼고 요청)"""
     coach = coach_by_id(st.session_state.coach_id)
-    system = system_prompt_for_questions(coach)
-    prev_qs = st.session_state.questions[:]
+    system = system_prompt_for_questions(coach, output_rule="출력: 단계별 질문 목록 JSON만 (각 항목은 질문 1개).\n")
+    steps = "\n".join(
+        f"{k}) {instruction_for_question(i, n, coach['id'])}" for k, i in enumerate(range(start, n), start=1)
+    )
+    count = n - start
+    # 고정 규칙/출력 형식을 앞에, 세션마다 다른 맥락을 뒤에 (프롬프트 캐시용)
+    user = (
+        "규칙:\n"
+        "- 결론/추천/정답/지시 금지\n"
+        "- 단계마다 질문 1개, 서로 겹치지 않게\n\n"
+        f"아래 JSON으로만 출력 (questions는 정확히 {count}개, 단계 순서대로):\n"
+        '{"questions": ["string"]}\n\n'
+        f"[질문 단계(총 {count}개)]\n{steps}\n\n"
+        f"{build_context_block()}"
+    )
+    return system, user
 
-    cross_q, cross_dbg = try_logic_crosscheck_question(i)
-    if cross_q and not any(is_similar(cross_q, pq) for pq in prev_qs):
-        return cross_q, None, cross_dbg
 
-    dbg_acc: List[str] = cross_dbg[:]
+def _parse_question_plan(txt: str, n: int, start: int, dbg: List[str]) -> Tuple[List[str], Optional[str], List[str]]:
+    data = safe_json_parse(txt)
+    raw_qs = data.get("questions") if data else None
+    if not isinstance(raw_qs, list):
+        dbg.append("Question plan JSON parse failed.")
+        return [], "질문 목록 JSON 파싱 실패(질문을 하나씩 생성합니다)", dbg
+    # 요청하지 않은 앞 질문 자리는 ""로 채워 인덱스를 맞춤
+    plan: List[str] = [""] * start
+    for k in range(n - start):
+        q = normalize(str(raw_qs[k])) if k < len(raw_qs) else ""
+        plan.append("" if contains_forbidden_recommendation(q) else q)
+    return plan, None, dbg
+
+
+def generate_question_plan(n: int, start: int = 0) -> Tuple[List[str], Optional[str], List[str]]:
+    """
+    메인 질문 n개(start번부터)를 한 번의 호출로 미리 받아 둠 (질문마다 1회씩 부르던 왕복을 1회로)
+    - 항목이 비었거나 금지 표현이 섞이면 ""로 두고, 그 차례에는 기존처럼 개별 생성
+    """
+    system, user = question_plan_prompts(n, start)
+    txt, err, dbg = call_llm_text(system=system, user=user, temperature=0.7, purpose="general")
+    if not txt:
+        return [], err, dbg
+    return _parse_question_plan(txt, n, start, dbg)
 
-    def prompt(nonce: int) -> str:
-        prev_txt = "\n".join([f"- {q}" for q in prev_qs[-6:]]) if prev_qs else "(없음)"
-        return textwrap.dedent(
-            f"""
-            [최근 질문 목록]
-            {prev_txt}
 
-            {build_context_block()}
+def start_question_plan(n: int, has_first: bool) -> None:
+    """
+    코칭 시작 버튼에서만 호출: 2번째 이후 질문 목록 요청을 openai-loop에 보내 두고 바로 질문 화면으로 넘어감
+    - 첫 질문은 온보딩에서 받은 것을 쓰거나 질문 화면에서 따로 생성하므로, 그동안 목록 요청이 함께 진행됨
+    - 목록은 두 번째 질문(인덱스 1)에서야 collect_question_plan으로 받음
+    - OpenAI를 쓸 수 없으면 기존처럼 그 자리에서 (첫 질문이 없으면 첫 질문까지) 받음
+    """
+    api_key = get_openai_api_key()
+    if not api_key or AsyncOpenAI is None:
+        plan, _, dbg = generate_question_plan(n, 1 if has_first else 0)
+        st.session_state.question_plan = plan
+        log_debug(dbg)
+        return
+    system, user = question_plan_prompts(n, 1)
+    debug: List[str] = [f"Question plan requested in background (questions 2~{n})."]
+    fut = submit_openai_text(api_key, system, user, 0.7, debug)
+    st.session_state.question_plan_pending = (fut, debug, n, 1)
 
-            [이번 질문 목적]
-            {instruction_for_question(i, n, coach["id"])}
 
-            규칙:
-            - 결론/추천/정답/지시 금지
-            - 질문 1개만 출력
-            - 이전 질문과 너무 비슷하면 피하기
+def collect_question_plan() -> None:
+    """보내 둔 질문 목록 요청이 있으면 결과를 기다려 question_plan에 넣음 (실패하면 한 번 더 직접 요청)"""
+    pending = st.session_state.question_plan_pending
+    if pending is None:
+        return
+    st.session_state.question_plan_pending = None
+    fut, debug, n, start = pending
+    txt, err = fut.result()
+    if txt:
+        plan, _, dbg = _parse_question_plan(txt, n, start, debug)
+    else:
+        if err:
+            debug.append(f"Background question plan failed: {err}")
+        plan, _, more = generate_question_plan(n, start)
+        dbg = debug + more
+    st.session_state.question_plan = plan
+    log_debug(dbg)
 
-            (nonce={nonce})
-            """
-        ).strip()
 
-    q1, err, dbg = call_llm_text(system=system, user=prompt(random.randint(1000, 9999)), temperature=0.7, purpose="question")
+def generate_question(
+    i: int, n: int, preview: Optional[Callable[[str], None]] = None
+) -> Tuple[str, Optional[str], List[str]]:
+    coach = coach_by_id(st.session_state.coach_id)
+    system = system_prompt_for_questions(coach)
+    prev_qs = st.session_state.questions[:]
+
+    openai_key = get_openai_api_key()
+    dbg_acc: List[str] = []
+
+    if i >= 1:
+        collect_question_plan()
+    plan = st.session_state.question_plan or []
+    planned = plan[i] if len(plan) == n else ""
+    planned_ok = bool(planned) and not any(is_similar(planned, pq) for pq in prev_qs)
+
+    cross_prompts = crosscheck_prompts(i)
+    cross_fut = None
+    cross_log: List[str] = []
+    if (
+        cross_prompts
+        and not planned_ok
+        and openai_key
+        and AsyncOpenAI is not None
+        and not st.session_state.get("use_gemini_boost", False)
+    ):
+        # 크로스체크는 대부분 "충돌 없음"이므로 본 질문 생성과 동시에 보내 두고,
+        # 충돌 질문이 나온 경우에만 본 질문을 버림
+        cross_fut = submit_openai_text(openai_key, *cross_prompts, 0.2, cross_log, None, CROSSCHECK_JSON_SCHEMA)
+    else:
+        cross_q, cross_dbg = try_logic_crosscheck_question(i)
+        if cross_q and not any(is_similar(cross_q, pq) for pq in prev_qs):
+            return cross_q, None, cross_dbg
+        dbg_acc.extend(cross_dbg)
+
+    if planned_ok:
+        dbg_acc.append("Using pre-generated question plan.")
+        return planned, None, dbg_acc
+
+    # nonce는 단계마다 한 번만 뽑고, 고온 후보/재생성은 nonce + 1로 구분
+    nonce = random.randint(1000, 99998)
+    q, err, dbg_acc = _generate_main_question(i, n, coach, system, prev_qs, openai_key, dbg_acc, nonce, preview)
+    if cross_fut is not None:
+        txt, cross_err = cross_fut.result()
+        if txt:
+            cross_q, cross_dbg = crosscheck_result(i, txt, cross_err, cross_log)
+        else:
+            # OpenAI 장애 시에는 직렬 경로(call_llm_text의 Gemini 폴백 포함)로 한 번 더 점검
+            cross_log.append("Concurrent crosscheck got no text. Retrying via the serial path.")
+            cross_q, more = try_logic_crosscheck_question(i)
+            cross_dbg = cross_log + more
+        dbg_acc.extend(cross_dbg)
+        if cross_q and not any(is_similar(cross_q, pq) for pq in prev_qs):
+            dbg_acc.append("Crosscheck question replaces the concurrently generated one.")
+            return cross_q, None, dbg_acc
+    return q, err, dbg_acc
+
+
+def _generate_main_question(
+    i: int,
+    n: int,
+    coach: Dict[str, Any],
+    system: str,
+    prev_qs: List[str],
+    openai_key: Optional[str],
+    dbg_acc: List[str],
+    nonce: int,
+    preview: Optional[Callable[[str], None]] = None,
+) -> Tuple[str, Optional[str], List[str]]:
+    def stop_if_repeating(buf: str, log: Optional[List[str]] = None) -> bool:
+        # 앞부분만으로 이미 이전 질문과 겹치면 끝까지 받지 않음 → 아래 is_similar 검사에서 걸러져 바로 재생성
+        head = normalize(buf)
+        if len(head) < QUESTION_EARLY_STOP_CHARS or not any(is_similar(head, pq) for pq in prev_qs):
+            return False
+        (dbg_acc if log is None else log).append("Similar question prefix while streaming. Stopped early.")
+        return True
+
+    def watch(buf: str) -> bool:
+        # 직렬 생성 경로: 받는 중인 질문을 화면에 먼저 보여 주고(체감 대기 단축), 반복이면 끊음
+        if preview is not None:
+            preview(buf)
+        return bool(prev_qs) and stop_if_repeating(buf)
+
+    serial_on_delta = watch if (preview is not None or prev_qs) else None
+
+    prev_txt = "\n".join([f"- {q}" for q in prev_qs[-6:]]) if prev_qs else "(없음)"
+    # 고정 규칙 → 세션 내용([세션 시작 정보]가 맨 앞) → 단계별 목적 순서
+    # (앞부분이 호출마다 같아야 OpenAI 프롬프트 캐시가 재사용됨, nonce는 항상 맨 끝)
+    prompt_head = (
+        f"{_QUESTION_RULES}\n\n"
+        f"{build_context_block()}\n\n"
+        f"[이번 질문 목적]\n{instruction_for_question(i, n, coach['id'])}\n\n"
+        f"[최근 질문 목록]\n{prev_txt}\n\n"
+    )
+    first_prompt, retry_prompt = f"{prompt_head}(nonce={nonce})", f"{prompt_head}(nonce={nonce + 1})"
+
+    if st.session_state.speculative_questions and prev_qs and openai_key and AsyncOpenAI is not None:
+        # 재생성용 고온(0.85) 후보를 처음부터 함께 보내, 먼저 도착해 유사도 검사를 통과한 쪽을 채택
+        # (두 후보 모두 openai-loop에 바로 올리므로 진 쪽 future를 취소하면 요청도 끊김, 로그는 후보별로 모았다가 끝난 순서대로 합침)
+        logs: List[List[str]] = [[], []]
+        samples = [(first_prompt, 0.7), (retry_prompt, 0.85)]
+        futs = {
+            submit_openai_text(
+                openai_key, system, user, temp, logs[k], lambda buf, log=logs[k]: stop_if_repeating(buf, log)
+            ): k
+            for k, (user, temp) in enumerate(samples)
+        }
+        got_text = False
+        pending = set(futs)
+        while pending:
+            done, pending = wait_futures(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                dbg_acc.extend(logs[futs[f]])
+                txt, _ = f.result()
+                if not txt:
+                    continue
+                got_text = True
+                q = normalize(txt)
+                if not any(is_similar(q, pq) for pq in prev_qs):
+                    for p in pending:
+                        p.cancel()
+                    dbg_acc.append(f"Speculative sample (T={samples[futs[f]][1]}) accepted.")
+                    return q, None, dbg_acc
+        if got_text:
+            dbg_acc.append("Both speculative samples were similar. Using fallback.")
+            return fallback_question(coach["id"], i, n), None, dbg_acc
+        dbg_acc.append("Speculative samples failed. Falling back to serial generation.")
+
+    q1, err, dbg = call_llm_text(
+        system=system,
+        user=first_prompt,
+        temperature=0.7,
+        purpose="question",
+        on_delta=serial_on_delta,
+    )
     dbg_acc.extend(dbg)
     if not q1:
         return fallback_question(coach["id"], i, n), err, dbg_acc
@@ -1294,7 +2100,13 @@ def generate_question(i: int, n: int) -> Tuple[str, Optional[str], List[str]]:
         return q1, None, dbg_acc
 
     dbg_acc.append("Similar question detected. Regenerating once.")
-    q2, err2, dbg2 = call_llm_text(system=system, user=prompt(random.randint(10000, 99999)), temperature=0.85, purpose="question")
+    q2, err2, dbg2 = call_llm_text(
+        system=system,
+        user=retry_prompt,
+        temperature=0.85,
+        purpose="question",
+        on_delta=watch,
+    )
     dbg_acc.extend(dbg2)
     if q2:
         q2 = normalize(q2)
@@ -1305,11 +2117,11 @@ def generate_question(i: int, n: int) -> Tuple[str, Optional[str], List[str]]:
     return fallback_question(coach["id"], i, n), err2, dbg_acc
 
 
-def ensure_question(index: int, total: int) -> None:
+def ensure_question(index: int, total: int, preview: Optional[Callable[[str], None]] = None) -> None:
     while len(st.session_state.questions) <= index:
         i = len(st.session_state.questions)
-        q, err, dbg = generate_question(i, total)
-        st.session_state.debug_log = dbg
+        q, err, dbg = generate_question(i, total, preview)
+        log_debug(dbg)
         st.session_state.questions.append(q)
 
 
@@ -1352,14 +2164,60 @@ FORBIDDEN_RECOMMEND_PATTERNS = [
 ]
 
 
+# 금지 패턴 전체를 import 시 한 번만 하나의 alternation으로 컴파일 → 텍스트를 한 번만 스캔
+_FORBIDDEN_RE = re.compile("|".join(f"(?:{p})" for p in FORBIDDEN_RECOMMEND_PATTERNS))
+
+
 def contains_forbidden_recommendation(text: str) -> bool:
-    t = text or ""
-    for pat in FORBIDDEN_RECOMMEND_PATTERNS:
-        if re.search(pat, t):
-            return True
+    return _FORBIDDEN_RE.search(text or "") is not None
+
+
+# 리포트 dict 안의 내부 캐시 자리(표시/내보내기 전에는 report_payload로 제거)
+REPORT_META_KEY = "_meta"
+
+
+def report_payload(data: Dict[str, Any]) -> Dict[str, Any]:
+    if REPORT_META_KEY not in data:
+        return data
+    return {k: v for k, v in data.items() if k != REPORT_META_KEY}
+
+
+def report_json_pretty(data: Dict[str, Any]) -> str:
+    """표시/내보내기용 JSON(indent=2)을 한 번만 만들어 data의 _meta에 보관"""
+    meta = data.setdefault(REPORT_META_KEY, {})
+    cached = meta.get("export_json")
+    if cached is None:
+        cached = _json_dumps_pretty(report_payload(data))
+        meta["export_json"] = cached
+    return cached
+
+
+def _iter_text_fields(obj: Any) -> Iterator[str]:
+    """리포트 안의 문자열 값만 순서대로 꺼냄 (키/숫자/_meta 제외)"""
+    if isinstance(obj, str):
+        yield obj
+    elif isinstance(obj, dict):
+        for k, v in obj.items():
+            if k != REPORT_META_KEY:
+                yield from _iter_text_fields(v)
+    elif isinstance(obj, list):
+        for v in obj:
+            yield from _iter_text_fields(v)
+
+
+def report_has_forbidden_phrasing(data: Dict[str, Any]) -> bool:
+    """금지 표현 검사 결과를 data에 표시해 두고, 이미 통과한 리포트는 다시 스캔하지 않음"""
+    if (data.get(REPORT_META_KEY) or {}).get("clean"):
+        return False
+    # JSON 문자열로 직렬화하지 않고 값만 모아 스캔 (버려질 리포트는 직렬화 비용 없이 걸러짐)
+    # 값 사이를 \x00으로 이어 붙여 alternation 한 번으로 검사 (어떤 패턴도 \x00을 건너 매칭되지 않음)
+    if contains_forbidden_recommendation("\x00".join(_iter_text_fields(data))):
+        return True
+    data.setdefault(REPORT_META_KEY, {})["clean"] = True
     return False
 
 
+@lru_cache(maxsize=None)
 def report_schema_hint(coach_id: str) -> str:
     base = """
 반드시 JSON만 출력하세요(코드블록/설명 금지).
@@ -1421,6 +2279,53 @@ JSON 스키마:
     ).strip()
 
 
+def _json_obj(**props: Any) -> Dict[str, Any]:
+    # Structured Outputs strict 모드: 모든 필드 required + 추가 필드 금지
+    return {"type": "object", "properties": props, "required": list(props), "additionalProperties": False}
+
+
+_JSON_STR: Dict[str, Any] = {"type": "string"}
+_JSON_STRS: Dict[str, Any] = {"type": "array", "items": _JSON_STR}
+
+# action 코치 주간 테이블의 요일 키 (스키마/기본값/표 렌더링 공용)
+WEEK_DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+def _report_schema(name: str, **extra: Any) -> Dict[str, Any]:
+    """report_schema_hint와 같은 모양의 JSON 스키마 (코치별 필드는 extra로 추가)"""
+    return {
+        "name": name,
+        "strict": True,
+        "schema": _json_obj(
+            summary=_json_obj(core_issue=_JSON_STR, goal=_JSON_STR, constraints=_JSON_STRS, options_mentioned=_JSON_STRS),
+            criteria={"type": "array", "items": _json_obj(name=_JSON_STR, priority={"type": "integer"}, why=_JSON_STR)},
+            **extra,
+            info_check_questions=_JSON_STRS,
+            coaching_message=_JSON_STRS,
+            next_self_question=_JSON_STR,
+        ),
+    }
+
+
+# ✅ 코치별 리포트 스키마 (OpenAI Structured Outputs → JSON 파싱 실패/스키마 누락 방지)
+REPORT_JSON_SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "action": _report_schema(
+        "report_action",
+        plan_visualization=_json_obj(year=_JSON_STR, month=_JSON_STR, week=_JSON_STRS),
+        weekly_table=_json_obj(**{d: _JSON_STRS for d in WEEK_DAYS}),
+    ),
+    "logic": _report_schema("report_logic", key_points=_json_obj(uncertainties=_JSON_STRS, tradeoffs=_JSON_STRS)),
+    "value": _report_schema("report_value", emotions_values=_json_obj(emotions=_JSON_STRS, top_values=_JSON_STRS)),
+}
+
+# ✅ 크로스체크 응답 스키마 (_CROSSCHECK_HEAD의 [출력 JSON]과 같은 모양)
+CROSSCHECK_JSON_SCHEMA: Dict[str, Any] = {
+    "name": "crosscheck",
+    "strict": True,
+    "schema": _json_obj(has_conflict={"type": "boolean"}, conflict_summary=_JSON_STR, question=_JSON_STR),
+}
+
+
 def system_prompt_for_report() -> str:
     return (
         "당신은 'AI 결정 코칭 앱'의 최종 요약 생성기입니다.\n"
@@ -1432,11 +2337,12 @@ def system_prompt_for_report() -> str:
 
 
 def build_qa_text_for_report() -> str:
-    qa_text = ""
-    for i, qa in enumerate(st.session_state.answers, start=1):
-        tag = "PROBE" if qa.get("kind") == "probe" else "MAIN"
-        qa_text += f"{i}) ({tag}) Q: {qa['q']}\n   A: {qa['a']}\n"
-    return qa_text
+    ss = st.session_state
+    parts: List[str] = []
+    for i, (kind, q, a) in enumerate(zip(ss.answers_kind, ss.answers_q, ss.answers_a), start=1):
+        tag = "PROBE" if kind == "probe" else "MAIN"
+        parts.append(f"{i}) ({tag}) Q: {q}\n   A: {a}")
+    return "\n".join(parts) + ("\n" if parts else "")
 
 
 def fallback_report_json() -> Dict[str, Any]:
@@ -1464,13 +2370,13 @@ def fallback_report_json() -> Dict[str, Any]:
         base["key_points"] = {"uncertainties": [], "tradeoffs": []}
     elif coach["id"] == "action":
         base["plan_visualization"] = {"year": "", "month": "", "week": []}
-        base["weekly_table"] = {"Mon": [], "Tue": [], "Wed": [], "Thu": [], "Fri": [], "Sat": [], "Sun": []}
+        base["weekly_table"] = {d: [] for d in WEEK_DAYS}
     else:
         base["emotions_values"] = {"emotions": [], "top_values": []}
     return base
 
 
-def generate_final_report_json() -> Tuple[Optional[Dict[str, Any]], Optional[str], List[str], Optional[str]]:
+def report_prompts() -> Tuple[str, str]:
     coach = coach_by_id(st.session_state.coach_id)
     system = system_prompt_for_report()
 
@@ -1497,8 +2403,30 @@ def generate_final_report_json() -> Tuple[Optional[Dict[str, Any]], Optional[str
 - info_check_questions는 질문 형태로 1~3개만
 """
     ).strip()
+    return system, user
+
 
-    text, err, dbg = call_llm_text(system=system, user=user, temperature=0.25, purpose="report")
+def generate_final_report_json(
+    fresh: bool = False, on_delta: Optional[Callable[[str], None]] = None
+) -> Tuple[Optional[Dict[str, Any]], Optional[str], List[str], Optional[str]]:
+    # fresh=True(“정리 생성/새로고침” 버튼)이면 캐시를 건너뛰고 새로 호출
+    schema = REPORT_JSON_SCHEMAS.get(st.session_state.coach_id, REPORT_JSON_SCHEMAS["value"])
+    call = partial(call_llm_text if fresh else call_llm_text_cached, json_schema=schema)
+    system, user = report_prompts()
+    text, err, dbg = call(system=system, user=user, temperature=0.25, purpose="report", on_delta=on_delta)
+    return finish_report(text, err, dbg, system, user, call, on_delta)
+
+
+def finish_report(
+    text: Optional[str],
+    err: Optional[str],
+    dbg: List[str],
+    system: str,
+    user: str,
+    call: Callable[..., Tuple[Optional[str], Optional[str], List[str]]],
+    on_delta: Optional[Callable[[str], None]] = None,
+) -> Tuple[Optional[Dict[str, Any]], Optional[str], List[str], Optional[str]]:
+    """모델 원문 → 리포트 dict (파싱 실패 시 대체 정리, 금지 표현이면 더 엄격한 프롬프트로 한 번 재생성)"""
     if not text:
         fb = fallback_report_json()
         dbg.append("Report fallback used (no model output).")
@@ -1510,24 +2438,159 @@ def generate_final_report_json() -> Tuple[Optional[Dict[str, Any]], Optional[str
         dbg.append("Report fallback used (JSON parse fail).")
         return fb, "리포트 JSON 파싱 실패(대체 정리를 표시합니다)", dbg, text
 
-    combined = json.dumps(data, ensure_ascii=False)
-    if contains_forbidden_recommendation(combined):
+    if report_has_forbidden_phrasing(data):
         dbg.append("Forbidden phrasing detected. Regenerating once.")
         stricter_user = user + "\n\n[경고] 추천/지시 표현 금지. 거울 비추기만."
-        text2, err2, dbg2 = call_llm_text(system=system, user=stricter_user, temperature=0.1, purpose="report")
+        text2, err2, dbg2 = call(system=system, user=stricter_user, temperature=0.1, purpose="report", on_delta=on_delta)
         dbg.extend(dbg2)
         if text2:
             data2 = safe_json_parse(text2)
-            if data2 is not None and not contains_forbidden_recommendation(json.dumps(data2, ensure_ascii=False)):
+            # 재생성 결과가 첫 결과와 같으면 같은 문서를 다시 스캔할 필요가 없음
+            if data2 is not None and data2 != data and not report_has_forbidden_phrasing(data2):
                 return data2, None, dbg, text2
         return data, None, dbg, text
 
     return data, None, dbg, text
 
 
+async def _submit_report_batch(api_key: str, system: str, user: str, json_schema: Dict[str, Any]) -> str:
+    client = get_openai_client(api_key)
+    line = json.dumps(
+        {
+            "custom_id": f"report-{int(time.time())}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": MODEL_PRIMARY,
+                "messages": [{"role": "system", "content": system}, {"role": "user", "content": user}],
+                # gpt-5 계열은 기본값 외 temperature를 거부하고, 배치에는 폴백 모델이 없으므로 보내지 않음
+                "response_format": {"type": "json_schema", "json_schema": json_schema},
+            },
+        },
+        ensure_ascii=False,
+    )
+    f = await client.files.create(file=("report.jsonl", line.encode("utf-8")), purpose="batch")
+    batch = await client.batches.create(
+        input_file_id=f.id, endpoint="/v1/chat/completions", completion_window=REPORT_BATCH_WINDOW
+    )
+    return batch.id
+
+
+async def _fetch_report_batch(api_key: str, batch_id: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """(배치 상태, 완료됐으면 모델 원문, 실패했으면 에러 메시지)"""
+    client = get_openai_client(api_key)
+    batch = await client.batches.retrieve(batch_id)
+    if batch.status == "failed":
+        errors = (batch.errors.data if batch.errors else None) or []
+        return batch.status, None, (errors[0].message if errors else None) or "배치 검증에 실패했습니다"
+    if batch.status != "completed":
+        return batch.status, None, None
+
+    # 성공한 줄은 output_file, 실패한 줄은 error_file에 들어옴
+    rows: List[Dict[str, Any]] = []
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if file_id:
+            content = await client.files.content(file_id)
+            rows.extend(json.loads(line) for line in content.text.splitlines() if line.strip())
+    error = "배치 결과에 응답이 없습니다"
+    for row in rows:
+        response = row.get("response") or {}
+        body = response.get("body") or {}
+        choices = body.get("choices") or []
+        if response.get("status_code") == 200 and choices:
+            return batch.status, ((choices[0].get("message") or {}).get("content") or "").strip(), None
+        detail = (row.get("error") or body.get("error") or {}).get("message")
+        error = f"배치 요청 실패(HTTP {response.get('status_code')}): {detail or '응답 없음'}"
+    return batch.status, None, error
+
+
+def poll_report_batch() -> bool:
+    """
+    최종 정리를 Batch API로 요청/확인 (대화형 호출 대신, 비용 50%↓·최대 24시간)
+    - 처음 들어오면 제출, 이후에는 REPORT_BATCH_POLL_SEC 간격(report_batch_watch의 자동 재실행) 또는 버튼으로 상태 확인
+    - 결과가 들어오면 일반 생성과 같은 후처리(finish_report)를 거쳐 final_report_json에 넣고 True
+    """
+    api_key = get_openai_api_key()
+    schema = REPORT_JSON_SCHEMAS.get(st.session_state.coach_id, REPORT_JSON_SCHEMAS["value"])
+    batch = st.session_state.report_batch
+    if batch is None:
+        system, user = report_prompts()
+        with st.spinner("배치 요청을 제출하는 중..."):
+            try:
+                batch_id = run_on_openai_loop(_submit_report_batch(api_key, system, user, schema))
+            except Exception as e:
+                st.error(f"배치 요청 제출 실패: {type(e).__name__}: {e}")
+                st.caption("위의 ‘정리 생성/새로고침’으로 바로 생성할 수 있어요.")
+                return False
+        batch = {"id": batch_id, "system": system, "user": user, "status": "validating", "checked_at": time.time()}
+        st.session_state.report_batch = batch
+
+    check = st.button("배치 상태 확인", use_container_width=True)
+    elapsed = time.time() - batch["checked_at"]
+    due = elapsed >= REPORT_BATCH_POLL_SEC - REPORT_BATCH_POLL_SLACK_SEC and batch["status"] not in REPORT_BATCH_DONE
+    if check or due:
+        try:
+            status, text, error = run_on_openai_loop(_fetch_report_batch(api_key, batch["id"]))
+        except Exception as e:
+            status, text, error = batch["status"], None, None
+            st.warning(f"배치 상태 확인 실패: {type(e).__name__}: {e}")
+        batch["status"], batch["checked_at"] = status, time.time()
+        if error:
+            # 실패한 줄은 빈 결과로 넘기지 않고 실패로 표시
+            batch["status"], batch["error"] = "failed", error
+        elif status == "completed":
+            dbg = [f"Report batch {batch['id']} completed."]
+            err = None if text else "배치 결과에 응답이 없습니다"
+            call = partial(call_llm_text, json_schema=schema)
+            data, err, dbg, raw = finish_report(text, err, dbg, batch["system"], batch["user"], call)
+            log_debug(dbg)
+            st.session_state.final_report_json = data
+            st.session_state.final_report_raw = pack_text(raw)
+            if err:
+                st.error(err)
+            return True
+
+    if batch["status"] in REPORT_BATCH_DONE:
+        st.error(f"배치 요청이 끝나지 못했어요(상태: {batch['status']}). ‘정리 생성/새로고침’으로 바로 생성할 수 있어요.")
+        if batch.get("error"):
+            st.caption(batch["error"])
+    else:
+        st.info(f"최종 정리를 배치로 생성 중이에요(상태: {batch['status']}, ID: {batch['id']}). 완료까지 최대 24시간 걸릴 수 있어요.")
+    return False
+
+
+@st.fragment(run_every=REPORT_BATCH_POLL_SEC)
+def report_batch_watch() -> None:
+    """배치 상태 영역만 REPORT_BATCH_POLL_SEC마다 다시 실행, 결과가 들어오면 전체 화면을 다시 그림"""
+    if poll_report_batch():
+        st.rerun()
+
+
 # =========================
 # UI helpers (리포트 렌더링 등)
 # =========================
+def stream_preview(placeholder: Any) -> Callable[[str], None]:
+    """스트리밍 중인 모델 원문(JSON)의 끝부분을 placeholder(st.empty)에 보여 주는 콜백"""
+
+    def _show(text: str) -> None:
+        if st.session_state.privacy_mode:
+            # 프라이버시 모드에서는 원문 대신 진행 상황만 표시
+            placeholder.caption(f"응답 수신 중… ({len(text)}자)")
+        else:
+            placeholder.code(text[-STREAM_PREVIEW_CHARS:], language="json")
+
+    return _show
+
+
+def question_preview(placeholder: Any) -> Callable[[str], None]:
+    """생성 중인 질문 앞부분을 질문 상자 자리(st.empty)에 보여 주는 콜백"""
+
+    def _show(text: str) -> None:
+        placeholder.markdown(f"**{normalize(text)}** ▌")
+
+    return _show
+
+
 def render_summary_block(data: Dict[str, Any]) -> None:
     s = data.get("summary", {}) or {}
     st.subheader("고민의 핵심 요약")
@@ -1558,15 +2621,16 @@ def render_criteria(data: Dict[str, Any]) -> List[str]:
     if not crit:
         st.caption("선택 기준이 충분히 드러나지 않았어요.")
         return []
-    rows = []
-    names: List[str] = []
-    for c in crit:
-        nm = str(c.get("name", "") or "").strip()
-        if nm:
-            names.append(nm)
-        rows.append({"기준": nm, "우선순위(1~5)": c.get("priority", ""), "왜 중요한가": c.get("why", "")})
-    st.dataframe(rows, use_container_width=True, hide_index=True)
-    return names
+    # 행 dict 목록 대신 열 리스트로 넘겨 행마다 키를 추론하는 과정을 건너뜀
+    # (리포트 표들은 모두 스타일(Styler) 없이 원본 데이터 + height="content"로 그림: 스크롤 컨테이너 없이 행 수만큼만 렌더)
+    col_name = [str(c.get("name", "") or "").strip() for c in crit]
+    cols = {
+        "기준": col_name,
+        "우선순위(1~5)": [c.get("priority", "") for c in crit],
+        "왜 중요한가": [c.get("why", "") for c in crit],
+    }
+    st.dataframe(cols, use_container_width=True, hide_index=True, height="content")
+    return [nm for nm in col_name if nm]
 
 
 def render_action_visualization(data: Dict[str, Any]) -> None:
@@ -1584,9 +2648,8 @@ def render_action_visualization(data: Dict[str, Any]) -> None:
         st.caption("주 단위 계획이 충분히 드러나지 않았어요.")
     st.subheader("주간 테이블(정리용)")
     cal = data.get("weekly_table", {}) or {}
-    days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-    table = [{"Day": d, "Tasks": "\n".join(cal.get(d, []) or [])} for d in days]
-    st.dataframe(table, use_container_width=True, hide_index=True)
+    tasks = ["\n".join(cal.get(d, []) or []) for d in WEEK_DAYS]
+    st.dataframe({"Day": list(WEEK_DAYS), "Tasks": tasks}, use_container_width=True, hide_index=True, height="content")
 
 
 def render_key_points_logic(data: Dict[str, Any]) -> None:
@@ -1639,23 +2702,33 @@ TENSION_AXES = [
     ("단기", "장기"),
 ]
 
+# 긴장 축 단어들을 한 번의 스캔으로 찾기 위한 패턴(lookahead로 겹치는 출현도 모두 잡음)
+_TENSION_WORDS = sorted({w for pair in TENSION_AXES for w in pair}, key=len, reverse=True)
+_TENSION_RE = re.compile("(?=(" + "|".join(re.escape(w) for w in _TENSION_WORDS) + "))")
+
 
 def _collect_tension_signals(data: Dict[str, Any]) -> Dict[str, str]:
+    # 정규화된 blob은 리포트 _meta에 보관해 재실행(rerun)마다 다시 만들지 않음
+    meta = data.setdefault(REPORT_META_KEY, {})
+    if "tension_blob" in meta:
+        return {"blob": meta["tension_blob"]}
     s = data.get("summary", {}) or {}
     crit = data.get("criteria", []) or []
-    crit_text = " ".join([str(c.get("name", "")) + " " + str(c.get("why", "")) for c in crit if isinstance(c, dict)])
+    crit_text = " ".join(f"{c.get('name', '')} {c.get('why', '')}" for c in crit if isinstance(c, dict))
     core = str(s.get("core_issue", "") or "")
     goal = str(s.get("goal", "") or "")
-    extras = ""
-    if "key_points" in data:
-        kp = data.get("key_points", {}) or {}
-        extras += " " + " ".join(kp.get("uncertainties", []) or [])
-        extras += " " + " ".join(kp.get("tradeoffs", []) or [])
-    if "emotions_values" in data:
-        ev = data.get("emotions_values", {}) or {}
-        extras += " " + " ".join(ev.get("emotions", []) or [])
-        extras += " " + " ".join(ev.get("top_values", []) or [])
-    blob = normalize(" ".join([core, goal, crit_text, extras]))
+    kp = data.get("key_points", {}) or {}
+    ev = data.get("emotions_values", {}) or {}
+    extras = " ".join(
+        itertools.chain(
+            kp.get("uncertainties", []) or [],
+            kp.get("tradeoffs", []) or [],
+            ev.get("emotions", []) or [],
+            ev.get("top_values", []) or [],
+        )
+    )
+    blob = normalize(" ".join((core, goal, crit_text, extras)))
+    meta["tension_blob"] = blob
     return {"blob": blob}
 
 
@@ -1666,10 +2739,8 @@ def render_tension_map(data: Dict[str, Any]) -> None:
     sig = _collect_tension_signals(data)
     blob = sig["blob"]
 
-    found_axes = []
-    for a, b in TENSION_AXES:
-        if (a in blob) and (b in blob):
-            found_axes.append((a, b))
+    present = frozenset(_TENSION_RE.findall(blob))
+    found_axes = [(a, b) for a, b in TENSION_AXES if a in present and b in present]
 
     crit = data.get("criteria", []) or []
     crit_sorted = []
@@ -1735,13 +2806,40 @@ def render_next_question(data: Dict[str, Any]) -> None:
     st.write(f"**{data.get('next_self_question','')}**")
 
 
-STOPWORDS = {
+STOPWORDS: FrozenSet[str] = frozenset({
     "그냥", "너무", "진짜", "근데", "그리고", "그래서", "하지만",
     "제가", "저는", "나는", "내가", "이게", "그게", "저",
     "것", "수", "좀", "약간", "때문", "때문에", "같아요", "같은",
     "하는", "해야", "하고", "있는", "있다", "없다", "없어요",
     "모르겠", "모르겠어요",
-}
+})
+
+# 단어/한글 연속 구간을 한 번에 뽑는 토크나이저 패턴(정리용 re.sub 2회 + split을 대체)
+_MIRROR_TOKEN_RE = re.compile(r"[\w가-힣]+")
+
+
+# 조사/어미를 떼고 남길 명사 품사 (일반/고유/의존 명사)
+_MECAB_NOUN_TAGS = frozenset({"NNG", "NNP", "NNB"})
+
+
+@st.cache_resource(show_spinner=False)
+def _mecab() -> Optional["MeCab"]:
+    # 사전 로딩이 무거우므로 세션 간 한 번만 생성, 실패하면 정규식 토큰으로 대체
+    if MeCab is None:
+        return None
+    try:
+        return MeCab()
+    except Exception:
+        return None
+
+
+def mirroring_tokens(text: str) -> List[str]:
+    tagger = _mecab()
+    if tagger is not None:
+        # "이직을/이직은/이직도"가 모두 "이직" 하나로 모이도록 명사만 사용
+        return [w for w, tag in tagger.pos(text) if tag in _MECAB_NOUN_TAGS and len(w) >= 2 and w not in STOPWORDS]
+    return [t for t in (m.lower() for m in _MIRROR_TOKEN_RE.findall(text)) if len(t) >= 2 and t not in STOPWORDS]
+
 
 EMOTION_WORDS = [
     "불안", "두려움", "걱정", "긴장", "답답", "후회", "죄책감", "부담",
@@ -1749,30 +2847,37 @@ EMOTION_WORDS = [
     "편안", "행복", "의욕", "지침", "번아웃",
 ]
 
+# 감정어 출현 수를 한 번의 스캔으로 세기 위한 패턴 (감정어끼리는 서로의 부분 문자열이 아님)
+_EMOTION_ALT_RE = re.compile("|".join(re.escape(w) for w in EMOTION_WORDS))
 
-def analyze_mirroring_from_answers() -> Tuple[pd.DataFrame, pd.DataFrame]:
-    text = " ".join([str(x.get("a", "")) for x in st.session_state.answers if x.get("a")])
-    clean = re.sub(r"[^\w가-힣 ]", " ", text)
-    clean = re.sub(r"\s+", " ", clean).strip().lower()
-    toks = [t for t in clean.split(" ") if len(t) >= 2 and t not in STOPWORDS]
-    freq: Dict[str, int] = {}
-    for t in toks:
-        freq[t] = freq.get(t, 0) + 1
-    kw = sorted(freq.items(), key=lambda x: x[1], reverse=True)[:10]
-    kw_df = pd.DataFrame(kw, columns=["키워드", "빈도"])
-
-    emo_freq: Dict[str, int] = {}
-    for ew in EMOTION_WORDS:
-        c = len(re.findall(re.escape(ew), text))
-        if c > 0:
-            emo_freq[ew] = c
-    emo = sorted(emo_freq.items(), key=lambda x: x[1], reverse=True)[:10]
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _analyze_mirroring(answers: Tuple[str, ...]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    import pandas as pd
+
+    text = " ".join(answers)
+    toks = mirroring_tokens(text)
+    # Counter(C 구현) 집계 + most_common의 top-K 선택. 동률은 처음 등장한 순서 유지
+    kw_df = pd.DataFrame(Counter(toks).most_common(10), columns=["키워드", "빈도"])
+
+    emo_freq = Counter(_EMOTION_ALT_RE.findall(text))
+    # 동률일 때는 EMOTION_WORDS 순서를 유지
+    emo = sorted(((ew, emo_freq[ew]) for ew in EMOTION_WORDS if emo_freq[ew]), key=lambda x: x[1], reverse=True)[:10]
     emo_df = pd.DataFrame(emo, columns=["감정어", "빈도"])
     return kw_df, emo_df
 
 
+def analyze_mirroring_from_answers() -> Tuple[pd.DataFrame, pd.DataFrame]:
+    # 리포트 페이지의 버튼/다운로드 rerun에서는 답변이 그대로이므로 캐시된 결과를 재사용
+    return _analyze_mirroring(tuple(st.session_state.answers_a))
+
+
 def render_mirroring_visual() -> None:
     st.subheader("내면의 목소리(Mirroring) — 답변에서 많이 등장한 표현")
+    if not any(a.strip() for a in st.session_state.answers_a):
+        # 답변이 비어 있으면 빈 표를 만들지 않고(pandas 로딩/캐시 해시 생략) 안내만 표시
+        st.caption("키워드가 충분히 잡히지 않았어요.")
+        return
     kw_df, emo_df = analyze_mirroring_from_answers()
     c1, c2 = st.columns(2)
     with c1:
@@ -1780,31 +2885,33 @@ def render_mirroring_visual() -> None:
         if len(kw_df) == 0:
             st.caption("키워드가 충분히 잡히지 않았어요.")
         else:
-            st.dataframe(kw_df, use_container_width=True, hide_index=True)
+            st.dataframe(kw_df, use_container_width=True, hide_index=True, height="content")
             st.bar_chart(kw_df.set_index("키워드")["빈도"])
     with c2:
         st.write("**감정어(Top 10)**")
         if len(emo_df) == 0:
             st.caption("감정어가 많이 등장하지 않았어요.")
         else:
-            st.dataframe(emo_df, use_container_width=True, hide_index=True)
+            st.dataframe(emo_df, use_container_width=True, hide_index=True, height="content")
             st.bar_chart(emo_df.set_index("감정어")["빈도"])
     st.caption("이 결과는 ‘정답’이 아니라, 답변에 나타난 반복 표현을 요약한 거울입니다.")
 
 
 def build_decision_matrix(options: List[str], criteria_names: List[str]) -> pd.DataFrame:
+    import numpy as np
+    import pandas as pd
+
     if not options:
         options = ["옵션 1", "옵션 2"]
     if not criteria_names:
         criteria_names = ["기준 1", "기준 2", "기준 3"]
     cols = ["옵션"] + criteria_names + ["메모"]
-    rows = []
-    for opt in options:
-        r = {"옵션": opt, "메모": ""}
-        for c in criteria_names:
-            r[c] = 3
-        rows.append(r)
-    return pd.DataFrame(rows, columns=cols)
+    n = len(options)
+    # 점수(1~5) 열은 int8로 만들어 합계를 NumPy 정수 연산으로 처리
+    frame: Dict[str, Any] = {"옵션": list(options), "메모": [""] * n}
+    for c in criteria_names:
+        frame[c] = np.full(n, 3, dtype=np.int8)
+    return pd.DataFrame(frame, columns=cols)
 
 
 def render_decision_matrix(criteria_names: List[str], data: Dict[str, Any]) -> None:
@@ -1815,21 +2922,17 @@ def render_decision_matrix(criteria_names: List[str], data: Dict[str, Any]) -> N
     report_opts = (data.get("summary", {}) or {}).get("options_mentioned", []) or []
     opts = user_opts or [str(x) for x in report_opts if str(x).strip()] or ["옵션 1", "옵션 2"]
 
-    if st.session_state.decision_matrix_df is None:
+    # 옵션/기준이 바뀐 경우에만 새 표를 만들고, 그 외 재실행에서는 기존(편집된) 표를 그대로 사용
+    # (기준이 비어 있으면 build_decision_matrix가 기본 기준을 채우므로 열 비교 대신 입력값으로 비교)
+    matrix_key = (frozenset(opts), tuple(criteria_names))
+    if st.session_state.decision_matrix_df is None or st.session_state.get("decision_matrix_key") != matrix_key:
         st.session_state.decision_matrix_df = build_decision_matrix(opts, criteria_names)
+        st.session_state.decision_matrix_key = matrix_key
+        # 새 표에 이전 표의 편집 내역이 덮어씌워지지 않도록 편집기 상태도 초기화
+        st.session_state.pop("decision_matrix_editor", None)
 
     df: pd.DataFrame = st.session_state.decision_matrix_df
 
-    existing_opts = [str(x) for x in df["옵션"].tolist()] if "옵션" in df.columns else []
-    if set(existing_opts) != set(opts):
-        st.session_state.decision_matrix_df = build_decision_matrix(opts, criteria_names)
-        df = st.session_state.decision_matrix_df
-
-    desired_cols = ["옵션"] + (criteria_names or []) + ["메모"]
-    if list(df.columns) != desired_cols:
-        st.session_state.decision_matrix_df = build_decision_matrix(opts, criteria_names)
-        df = st.session_state.decision_matrix_df
-
     col_cfg: Dict[str, Any] = {}
     for c in criteria_names:
         col_cfg[c] = st.column_config.NumberColumn(c, min_value=1, max_value=5, step=1, format="%d")
@@ -1838,93 +2941,127 @@ def render_decision_matrix(criteria_names: List[str], data: Dict[str, Any]) -> N
         df,
         use_container_width=True,
         hide_index=True,
+        height="content",
         column_config=col_cfg,
         num_rows="fixed",
+        # 고정 key + 고정 행 수면 위젯 식별이 표 스키마 기준이 되어, 점수 편집이 원본 표 위에 그대로 유지됨
+        # (편집본을 다시 입력으로 넘기지 않으므로 매 rerun마다 위젯이 새로 만들어지지 않음)
+        key="decision_matrix_editor",
     )
-    st.session_state.decision_matrix_df = edited
 
     if criteria_names:
+        import numpy as np
+        import pandas as pd
+
         try:
-            totals = edited[criteria_names].sum(axis=1)
-            show = edited.copy()
-            show["총점(참고)"] = totals
+            # 비워진 칸은 0점으로 보고 int8 행렬에서 바로 합산
+            totals = edited[criteria_names].fillna(0).to_numpy(dtype=np.int8).sum(axis=1)
+            # 편집 표 전체를 복사하지 않고 표시할 두 열만으로 작은 표를 만듦
+            show = pd.DataFrame({"옵션": edited["옵션"].to_numpy(), "총점(참고)": totals})
             st.write("**총점(참고용)**")
-            st.dataframe(show[["옵션", "총점(참고)"]], use_container_width=True, hide_index=True)
+            st.dataframe(show, use_container_width=True, hide_index=True, height="content")
             st.caption("총점은 결론이 아니라, 기준별 강/약점을 다시 보게 하는 참고치예요.")
         except Exception:
             pass
 
 
-def render_copy_to_clipboard_button(text: str, button_label: str = "클립보드에 복사") -> None:
-    safe = text.replace("\\", "\\\\").replace("`", "\\`").replace("${", "\\${")
-    html = f"""
+# 복사 버튼 iframe 템플릿 ({label}, {payload}만 채움). 같은 텍스트면 같은 HTML이 되어 프론트가 iframe을 다시 띄우지 않음
+_CLIPBOARD_HTML_TEMPLATE = """
     <div style="display:flex; gap:8px; align-items:center;">
-      <button
-        onclick="navigator.clipboard.writeText(`{safe}`).then(()=>{{const el=document.getElementById('cpmsg'); el.innerText='복사됨'; setTimeout(()=>el.innerText='',1200);}});"
+      <button id="cpbtn"
         style="padding:8px 12px; border-radius:10px; border:1px solid #444; background:#111; color:#fff; cursor:pointer;">
-        {button_label}
+        {label}
       </button>
       <span id="cpmsg" style="font-size:12px; opacity:0.8;"></span>
     </div>
+    <script>
+      const text = {payload};
+      document.getElementById('cpbtn').addEventListener('click', () => {{
+        navigator.clipboard.writeText(text).then(()=>{{const el=document.getElementById('cpmsg'); el.innerText='복사됨'; setTimeout(()=>el.innerText='',1200);}});
+      }});
+    </script>
     """
+
+
+def render_copy_to_clipboard_button(text: str, button_label: str = "클립보드에 복사") -> None:
+    # JSON 문자열은 그대로 JS 문자열 리터럴이 됨(C 레벨 한 번 이스케이프). "</"만 바꿔 </script> 조기 종료 방지
+    payload = json.dumps(text, ensure_ascii=False).replace("</", "<\\/")
+    html = _CLIPBOARD_HTML_TEMPLATE.format(label=button_label, payload=payload)
     st.components.v1.html(html, height=55)
 
 
-def build_report_text_for_export(data: Dict[str, Any]) -> str:
-    lines: List[str] = []
-    lines.append("🪨 돌멩이 AI 결정 코칭 — 최종 정리(거울 비추기)")
-    lines.append(f"- 생성 시각: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    lines.append("")
-    lines.append("[세션 정보]")
-    lines.append(f"- 카테고리: {st.session_state.category}")
-    lines.append(f"- 결정 유형: {st.session_state.decision_type}")
-    lines.append(f"- 상황 설명: {st.session_state.situation}")
-    lines.append(f"- 목표: {st.session_state.goal}")
-    lines.append(f"- 옵션: {st.session_state.options or '(없음)'}")
-    if st.session_state.emotion_pre is not None or st.session_state.emotion_post is not None:
-        lines.append(f"- 감정 강도(시작/끝): {st.session_state.emotion_pre} → {st.session_state.emotion_post}")
-    lines.append("")
-    lines.append("[리포트 JSON]")
-    lines.append(json.dumps(data, ensure_ascii=False, indent=2))
-    lines.append("")
-    lines.append("[Q/A]")
-    for i, qa in enumerate(st.session_state.answers, start=1):
-        tag = "PROBE" if qa.get("kind") == "probe" else "MAIN"
-        lines.append(f"{i}. ({tag}) Q: {qa['q']}")
-        lines.append(f"   A: {qa['a']}")
-        lines.append(f"   ts: {qa['ts']}")
-        lines.append("")
-    return "\n".join(lines).strip()
+def build_report_text_for_export(data: Dict[str, Any], now: Optional[datetime] = None) -> str:
+    ss = st.session_state
+    now = now or datetime.now()
+    emotion_line = ""
+    if ss.emotion_pre is not None or ss.emotion_post is not None:
+        emotion_line = f"- 감정 강도(시작/끝): {ss.emotion_pre} → {ss.emotion_post}\n"
+
+    # 고정 모양의 머리말은 f-string 하나로 만들고, Q/A만 반복으로 붙임
+    header = f"""🪨 돌멩이 AI 결정 코칭 — 최종 정리(거울 비추기)
+- 생성 시각: {now.strftime('%Y-%m-%d %H:%M:%S')}
+
+[세션 정보]
+- 카테고리: {ss.category}
+- 결정 유형: {ss.decision_type}
+- 상황 설명: {ss.situation}
+- 목표: {ss.goal}
+- 옵션: {ss.options or '(없음)'}
+{emotion_line}
+[리포트 JSON]
+{report_json_pretty(data)}
+
+[Q/A]
+"""
+    qa_lines: List[str] = []
+    for i, (kind, q, a, ts) in enumerate(zip(ss.answers_kind, ss.answers_q, ss.answers_a, ss.answers_ts), start=1):
+        tag = "PROBE" if kind == "probe" else "MAIN"
+        qa_lines.append(f"{i}. ({tag}) Q: {q}\n   A: {a}\n   ts: {format_ts(ts)}\n")
+    return (header + "\n".join(qa_lines)).strip()
+
+
+def report_export_text(data: Dict[str, Any], masked: bool = False) -> str:
+    """
+    내보내기 텍스트(와 마스킹본)를 한 번만 만들어 data의 _meta에 보관
+    - 리포트 페이지에서 바뀔 수 있는 값은 감정 강도뿐이라, 그 값이 바뀔 때만 다시 만듦
+    """
+    meta = data.setdefault(REPORT_META_KEY, {})
+    key = (st.session_state.emotion_pre, st.session_state.emotion_post)
+    if meta.get("export_text_key") != key:
+        meta["export_text_key"] = key
+        meta["export_text"] = build_report_text_for_export(data)
+        meta.pop("export_text_masked", None)
+    if not masked:
+        return meta["export_text"]
+    if "export_text_masked" not in meta:
+        meta["export_text_masked"] = mask_text_for_privacy(meta["export_text"])
+    return meta["export_text_masked"]
+
+
+def report_json_masked(data: Dict[str, Any]) -> str:
+    meta = data.setdefault(REPORT_META_KEY, {})
+    if "export_json_masked" not in meta:
+        meta["export_json_masked"] = mask_text_for_privacy(report_json_pretty(data))
+    return meta["export_json_masked"]
 
 
 # =========================
 # Back
 # =========================
 def handle_back() -> None:
-    if not st.session_state.answers:
-        st.session_state.q_index = max(0, int(st.session_state.q_index) - 1)
-        st.session_state.probe_active = False
-        st.session_state.probe_question = ""
-        st.session_state.probe_for_index = None
-        st.session_state.probe_mode = ""
+    ss = st.session_state
+    if not answer_count():
+        clear_probe()
+        ss.q_index = max(0, int(ss.q_index) - 1)
         return
 
-    last = st.session_state.answers.pop()
-
+    last = pop_answer()
+    clear_probe()
     if last.get("kind") == "probe":
-        st.session_state.probe_active = False
-        st.session_state.probe_question = ""
-        st.session_state.probe_for_index = None
-        st.session_state.probe_mode = ""
-        st.session_state.q_index = int(last.get("main_index", st.session_state.q_index))
+        ss.q_index = int(last.get("main_index", ss.q_index))
         return
 
-    mi = int(last.get("main_index", 0))
-    st.session_state.probe_active = False
-    st.session_state.probe_question = ""
-    st.session_state.probe_for_index = None
-    st.session_state.probe_mode = ""
-    st.session_state.q_index = max(0, mi)
+    ss.q_index = max(0, int(last.get("main_index", 0)))
 
 
 # =========================
@@ -1947,6 +3084,13 @@ with st.sidebar:
     else:
         st.session_state.use_gemini_boost = False
 
+    # ✅ 질문 재생성 대비 병렬 후보 토글 (OpenAI 키가 있을 때만)
+    if get_openai_api_key():
+        st.toggle("질문 후보 2개 동시 생성(대기↓, 호출 비용↑)", key="speculative_questions")
+        st.caption("ON이면 비슷한 질문이 나와 다시 만들 때의 대기를 줄이려고, 처음부터 후보 2개를 함께 요청합니다.")
+        st.toggle("최종 정리는 나중에 받기(배치, 비용 50%↓)", key="report_via_batch")
+        st.caption("ON이면 최종 정리를 OpenAI Batch로 요청하고 완료(최대 24시간)되면 이 화면에서 불러옵니다. 세션을 닫으면 결과를 찾을 수 없어요.")
+
     st.divider()
     st.subheader("프라이버시 모드")
     st.toggle("프라이버시 모드", key="privacy_mode")
@@ -1981,7 +3125,7 @@ with st.sidebar:
         with coly:
             st.download_button(
                 "프리셋 JSON 다운로드",
-                data=json.dumps(st.session_state.saved_templates, ensure_ascii=False, indent=2).encode("utf-8"),
+                data=_json_dumps_pretty(st.session_state.saved_templates).encode("utf-8"),
                 file_name="pebble_templates.json",
                 mime="application/json",
                 use_container_width=True,
@@ -2046,8 +3190,11 @@ with st.sidebar:
             st.rerun()
 
     st.divider()
-    with st.expander("디버그 로그"):
-        st.write(st.session_state.debug_log)
+    # 펼쳤을 때만 로그(최대 DEBUG_LOG_MAX줄)를 그림 → 접힌 상태의 rerun에서는 목록 변환/전송 생략
+    debug_box = st.expander("디버그 로그", key="debug_log_open", on_change="rerun")
+    if debug_box.open:
+        with debug_box:
+            st.write(list(st.session_state.debug_log))
 
     st.divider()
     with st.expander("배포 체크리스트 (Streamlit Cloud)"):
@@ -2100,30 +3247,34 @@ def render_landing() -> None:
         st.subheader("1단계 · 고민 작성")
         st.caption("지금 고민 중인 상황을 자유롭게 적어주세요.")
 
-        with st.container(border=True):
-            if st.session_state.privacy_mode:
-                st.caption("프라이버시 모드: 화면 공유 시 민감 표시를 줄입니다.")
-            st.text_area(
-                "고민 내용",
-                key="user_problem",
-                height=220,
-                placeholder="예: 이직 제안을 받았는데 안정성과 성장 사이에서 고민돼요…",
-                label_visibility="collapsed",
-            )
-
-        c1, c2 = st.columns([2, 1])
-        with c1:
-            st.session_state.num_questions = st.slider("질문 개수(2~10)", 2, 10, int(st.session_state.num_questions))
-        with c2:
-            if st.button("다음 단계로", type="primary", use_container_width=True):
-                txt = (st.session_state.user_problem or "").strip()
-                if not txt:
-                    st.warning("고민 내용을 먼저 한 줄이라도 적어주세요.")
-                else:
-                    if not (st.session_state.situation or "").strip():
-                        st.session_state.situation = txt
-                    st.session_state.page = "setup_details"
-                    st.rerun()
+        # 입력/슬라이더 조작마다 전체 스크립트가 재실행되지 않도록 form으로 묶어 제출 시 한 번만 반영
+        with st.form("landing_form", border=False):
+            with st.container(border=True):
+                if st.session_state.privacy_mode:
+                    st.caption("프라이버시 모드: 화면 공유 시 민감 표시를 줄입니다.")
+                st.text_area(
+                    "고민 내용",
+                    key="user_problem",
+                    height=220,
+                    placeholder="예: 이직 제안을 받았는데 안정성과 성장 사이에서 고민돼요…",
+                    label_visibility="collapsed",
+                )
+
+            c1, c2 = st.columns([2, 1])
+            with c1:
+                st.session_state.num_questions = st.slider("질문 개수(2~10)", 2, 10, int(st.session_state.num_questions))
+            with c2:
+                submitted = st.form_submit_button("다음 단계로", type="primary", use_container_width=True)
+
+        if submitted:
+            txt = (st.session_state.user_problem or "").strip()
+            if not txt:
+                st.warning("고민 내용을 먼저 한 줄이라도 적어주세요.")
+            else:
+                if not (st.session_state.situation or "").strip():
+                    st.session_state.situation = txt
+                st.session_state.page = "setup_details"
+                st.rerun()
 
 
 def render_setup_details() -> None:
@@ -2135,8 +3286,10 @@ def render_setup_details() -> None:
     auto_generate = st.session_state.onboarding_reco is None and bool(problem_text)
     if auto_generate:
         with st.spinner("AI가 고민을 읽고 추천을 만드는 중..."):
-            reco, err, dbg, raw = generate_onboarding_recommendation(problem_text)
-            st.session_state.debug_log = dbg
+            preview = st.empty()
+            reco, err, dbg, raw = generate_onboarding_recommendation(problem_text, on_delta=stream_preview(preview))
+            preview.empty()
+            log_debug(dbg)
             st.session_state.onboarding_reco = reco
             st.session_state.onboarding_raw = raw
             if err:
@@ -2148,8 +3301,12 @@ def render_setup_details() -> None:
     with top[1]:
         if st.button("추천 다시 생성", use_container_width=True):
             with st.spinner("추천을 다시 생성하는 중..."):
-                reco, err, dbg, raw = generate_onboarding_recommendation(problem_text)
-                st.session_state.debug_log = dbg
+                preview = st.empty()
+                reco, err, dbg, raw = generate_onboarding_recommendation(
+                    problem_text, fresh=True, on_delta=stream_preview(preview)
+                )
+                preview.empty()
+                log_debug(dbg)
                 st.session_state.onboarding_reco = reco
                 st.session_state.onboarding_raw = raw
                 st.session_state.onboarding_applied = False
@@ -2166,13 +3323,13 @@ def render_setup_details() -> None:
     reco = st.session_state.onboarding_reco or {}
     if reco and not st.session_state.onboarding_applied:
         rec_cat = reco.get("recommended_category", "")
-        if rec_cat in [c[0] for c in TOPIC_CATEGORIES]:
+        if rec_cat in TOPIC_CATEGORY_KEYS:
             st.session_state.category = rec_cat
         rec_dt = reco.get("recommended_decision_type", "")
         if rec_dt in DECISION_TYPES:
             st.session_state.decision_type = rec_dt
         rec_coach = reco.get("recommended_coach_id", "")
-        if rec_coach in [c["id"] for c in COACHES]:
+        if rec_coach in COACH_BY_ID:
             st.session_state.coach_id = rec_coach
         goal_draft = str(reco.get("goal_draft", "") or "").strip()
         if goal_draft and not (st.session_state.goal or "").strip():
@@ -2184,45 +3341,56 @@ def render_setup_details() -> None:
     st.divider()
     st.subheader("추천값 확인/수정")
 
-    c1, c2 = st.columns(2)
-    with c1:
-        st.selectbox("카테고리", [x[0] for x in TOPIC_CATEGORIES], key="category")
-        st.selectbox("결정 유형", DECISION_TYPES, key="decision_type")
-        st.text_input("원하는 목표(초안)", key="goal", placeholder="예: 내가 중요하게 여기는 기준을 선명하게 만들고 싶다")
-        st.text_input("옵션(쉼표로 구분, 선택)", key="options", placeholder="예: A, B, C")
-        st.slider("질문 개수(2~10)", 2, 10, int(st.session_state.num_questions), key="num_questions")
-    with c2:
-        coach_labels = [f"{c['name']} — {c['tagline']}" for c in COACHES]
-        cur = next((i for i, c in enumerate(COACHES) if c["id"] == st.session_state.coach_id), 0)
-        picked = st.radio("코치 선택", coach_labels, index=cur)
-        st.session_state.coach_id = COACHES[coach_labels.index(picked)]["id"]
-        coach = coach_by_id(st.session_state.coach_id)
-
-        reason = str(reco.get("coach_reason", "") or "").strip()
-        if reason:
-            st.info(f"**AI가 이 코치를 추천한 이유(참고):** {reason}")
-
-        with st.expander("코치 진행 방식"):
-            st.markdown(f"**{coach['name']}** \n_{coach['style']}_")
-            for m in coach["method"]:
-                st.write(f"- {m}")
-            st.caption(f"특징: {coach['prompt_hint']}")
-
-    st.subheader("상황 설명(편집 가능)")
-    st.text_area("상황 설명", key="situation", height=180)
+    # 위젯을 바꿀 때마다 전체 재실행되지 않도록 form으로 묶어, 적용/시작 버튼을 누를 때 한 번에 반영
+    # (“코칭 시작하기”도 같은 form의 제출 버튼이라, 적용을 따로 누르지 않아도 수정값이 함께 반영됨)
+    with st.form("setup_edits", clear_on_submit=False, border=False):
+        c1, c2 = st.columns(2)
+        with c1:
+            st.selectbox("카테고리", TOPIC_CATEGORY_KEYS, key="category")
+            st.selectbox("결정 유형", DECISION_TYPES, key="decision_type")
+            st.text_input("원하는 목표(초안)", key="goal", placeholder="예: 내가 중요하게 여기는 기준을 선명하게 만들고 싶다")
+            st.text_input("옵션(쉼표로 구분, 선택)", key="options", placeholder="예: A, B, C")
+            st.slider("질문 개수(2~10)", 2, 10, int(st.session_state.num_questions), key="num_questions")
+        with c2:
+            cur = COACH_INDEX_BY_ID.get(st.session_state.coach_id, 0)
+            # 선택지는 coach id, 표시는 라벨 → 고른 값을 라벨 목록에서 다시 찾지 않고 바로 조회
+            picked = st.radio("코치 선택", COACH_IDS, index=cur, format_func=COACH_LABEL_BY_ID.__getitem__)
+            st.session_state.coach_id = picked
+            coach = COACH_BY_ID[picked]
+
+            reason = str(reco.get("coach_reason", "") or "").strip()
+            if reason:
+                st.info(f"**AI가 이 코치를 추천한 이유(참고):** {reason}")
+
+            with st.expander("코치 진행 방식"):
+                st.markdown(f"**{coach['name']}** \n_{coach['style']}_")
+                st.markdown("\n".join(f"- {m}" for m in coach["method"]))
+                st.caption(f"특징: {coach['prompt_hint']}")
+
+        st.subheader("상황 설명(편집 가능)")
+        st.text_area("상황 설명", key="situation", height=180)
+
+        f1, f2 = st.columns([1, 1])
+        with f1:
+            st.form_submit_button("변경 사항 적용", use_container_width=True)
+        with f2:
+            start = st.form_submit_button("코칭 시작하기(실행하기)", type="primary", use_container_width=True)
 
     with st.expander("결정 유형 가이드(템플릿)"):
         st.caption("필요하면 아래 가이드를 상황 설명에 삽입할 수 있어요.")
         tmpl = DECISION_TEMPLATES.get(st.session_state.decision_type, "")
         if tmpl:
             st.code(tmpl, language="text")
-            if st.button("가이드 삽입(상황 설명에 추가)", use_container_width=True):
-                cur_txt = (st.session_state.situation or "").strip()
-                st.session_state.situation = (cur_txt + "\n\n" + tmpl).strip() if cur_txt else tmpl
-                st.rerun()
+            # situation 위젯은 위 폼에서 이미 만들어졌으므로 값 변경은 스크립트 실행 전에 도는 on_click 콜백에서 처리
+            st.button(
+                "가이드 삽입(상황 설명에 추가)",
+                use_container_width=True,
+                on_click=insert_decision_template,
+                args=(st.session_state.decision_type,),
+            )
 
     st.divider()
-    b1, b2, b3 = st.columns([1, 1, 1])
+    b1, b2 = st.columns([1, 1])
     with b1:
         if st.button("⬅️ 이전 단계", use_container_width=True):
             st.session_state.page = "landing"
@@ -2233,23 +3401,48 @@ def render_setup_details() -> None:
                 st.code(st.session_state.onboarding_raw, language="json")
             else:
                 st.caption("추천 원문이 아직 없습니다.")
-    with b3:
-        if st.button("코칭 시작하기(실행하기)", type="primary", use_container_width=True):
-            st.session_state.q_index = 0
-            st.session_state.questions = []
-            st.session_state.answers = []
-            st.session_state.probe_active = False
-            st.session_state.probe_question = ""
-            st.session_state.probe_for_index = None
-            st.session_state.probe_mode = ""
-            st.session_state.crosscheck_used_for = []
-            st.session_state.final_report_json = None
-            st.session_state.final_report_raw = None
-            st.session_state.decision_matrix_df = None
-            st.session_state.page = "questions"
-            st.session_state.summary_buffer = ""
-            st.session_state.summarized_main_count = 0
-            st.rerun()
+
+    if start:
+        st.session_state.update(flow_reset_values())
+        # 온보딩에서 받은 첫 질문이 있으면 미리 채워 ensure_question이 0번 질문 호출을 건너뜀
+        first_q = onboarding_first_question()
+        if first_q:
+            st.session_state.questions = [first_q]
+        st.session_state.page = "questions"
+        # 질문 목록은 이 버튼을 눌렀을 때만 요청 (첫 질문을 보여 주는/만드는 동안 나머지를 받음)
+        with st.spinner("질문을 준비하는 중..."):
+            start_question_plan(int(st.session_state.num_questions), bool(first_q))
+        st.rerun()
+
+
+def answer_history_html() -> str:
+    """
+    답변 기록 expander용 HTML (답변이 추가/삭제될 때만 다시 만들고 그 외 재실행에서는 재사용)
+    - 답변마다 요소 4개씩 보내지 않고 한 덩어리로 렌더링
+    - 사용자 입력은 escape, 줄바꿈은 <br>로 바꿔 빈 줄이 HTML 블록을 끊지 않게 함
+    """
+    cached = st.session_state.get("answer_history_html")
+    if cached is not None:
+        return cached
+
+    ss = st.session_state
+    grouped: Dict[int, List[str]] = defaultdict(list)
+    for mi, kind, sub, q, a, ts in zip(
+        ss.answers_main_index, ss.answers_kind, ss.answers_subkind, ss.answers_q, ss.answers_a, ss.answers_ts
+    ):
+        tag = "PROBE" if kind == "probe" else "MAIN"
+        tag2 = f"{tag}:{sub}" if sub else tag
+        q_html = html_escape(str(q)).replace("\n", "<br>")
+        a_html = html_escape(str(a)).replace("\n", "<br>")
+        grouped[int(mi or 0)].append(
+            f"<p><b>({html_escape(tag2)}) {q_html}</b></p>"
+            f"<p>{a_html}</p>"
+            f'<p style="font-size:0.85em; opacity:0.6;">{html_escape(format_ts(ts))}</p>'
+            "<hr>"
+        )
+    html = "".join(f"<h3>Q{mi + 1}</h3>" + "".join(grouped[mi]) for mi in sorted(grouped))
+    st.session_state.answer_history_html = html
+    return html
 
 
 def render_questions() -> None:
@@ -2266,7 +3459,10 @@ def render_questions() -> None:
         st.session_state.emotion_pre = st.slider("현재 감정 강도", 1, 5, 3, key="emotion_pre_slider")
         st.divider()
 
-    ensure_question(q_idx, nq_local)
+    if len(st.session_state.questions) <= q_idx:
+        preview = st.empty()
+        ensure_question(q_idx, nq_local, question_preview(preview))
+        preview.empty()
     main_q = st.session_state.questions[q_idx]
 
     if st.session_state.probe_active and st.session_state.probe_for_index == q_idx:
@@ -2280,7 +3476,7 @@ def render_questions() -> None:
 
     top_c1, top_c2, top_c3 = st.columns([1, 2, 1])
     with top_c1:
-        if st.button("⬅️ 이전으로", use_container_width=True, disabled=(q_idx == 0 and not st.session_state.answers)):
+        if st.button("⬅️ 이전으로", use_container_width=True, disabled=(q_idx == 0 and not answer_count())):
             handle_back()
             st.rerun()
     with top_c3:
@@ -2301,28 +3497,26 @@ def render_questions() -> None:
         else:
             if kind == "probe":
                 add_answer(show_q, a, kind="probe", main_index=q_idx, subkind=st.session_state.probe_mode or "")
-                st.session_state.probe_active = False
-                st.session_state.probe_question = ""
-                st.session_state.probe_for_index = None
-                st.session_state.probe_mode = ""
+                clear_probe()
                 st.session_state.q_index = min(q_idx + 1, nq_local - 1)
                 st.rerun()
 
             add_answer(show_q, a, kind="main", main_index=q_idx, subkind="")
             update_summary_buffer_if_needed()
 
-            if is_confused_answer(a):
+            answer_flags = classify_answer(a)
+            if answer_flags & ANSWER_CONFUSED:
                 rq, err, dbg = generate_reframe_question(show_q, a)
-                st.session_state.debug_log = dbg
+                log_debug(dbg)
                 st.session_state.probe_active = True
                 st.session_state.probe_question = rq
                 st.session_state.probe_for_index = q_idx
                 st.session_state.probe_mode = "reframe"
                 st.rerun()
 
-            if is_too_short_answer(a):
+            if answer_flags & ANSWER_SHORT:
                 pq, err, dbg = generate_probe_question(show_q, a)
-                st.session_state.debug_log = dbg
+                log_debug(dbg)
                 st.session_state.probe_active = True
                 st.session_state.probe_question = pq
                 st.session_state.probe_for_index = q_idx
@@ -2339,19 +3533,9 @@ def render_questions() -> None:
 
     if not (st.session_state.privacy_mode and st.session_state.hide_history):
         with st.expander("답변 기록"):
-            grouped: Dict[int, List[Dict[str, Any]]] = {}
-            for qa in st.session_state.answers:
-                grouped.setdefault(int(qa.get("main_index", 0)), []).append(qa)
-            for mi in sorted(grouped.keys()):
-                st.markdown(f"### Q{mi + 1}")
-                for qa in grouped[mi]:
-                    tag = "PROBE" if qa.get("kind") == "probe" else "MAIN"
-                    sub = qa.get("subkind", "")
-                    tag2 = f"{tag}:{sub}" if sub else tag
-                    st.markdown(f"**({tag2}) {qa['q']}**")
-                    st.write(qa["a"])
-                    st.caption(qa["ts"])
-                    st.divider()
+            history = answer_history_html()
+            if history:
+                st.markdown(history, unsafe_allow_html=True)
     else:
         st.caption("프라이버시 모드: 답변 기록이 숨김 처리되었습니다.")
 
@@ -2377,6 +3561,7 @@ def render_emotion_delta_block() -> None:
 def render_report() -> None:
     coach = coach_by_id(st.session_state.coach_id)
     nq_local = int(st.session_state.num_questions)
+    now = datetime.now()  # 파일명/유효기간이 같은 시각을 기준으로 하도록 한 번만 읽음
 
     st.title("최종 정리")
     st.caption("추천/정답 없이, 고민의 핵심과 기준을 ‘거울 비추기’ 방식으로 정리합니다.")
@@ -2405,16 +3590,23 @@ def render_report() -> None:
             reset_flow("landing", keep_problem=False)
             st.rerun()
 
-    if gen or (st.session_state.final_report_json is None and st.session_state.final_report_raw is None):
+    pending = st.session_state.final_report_json is None and st.session_state.final_report_raw is None
+    if not gen and pending and st.session_state.report_via_batch and get_openai_api_key():
+        # 배치 모드: 결과가 들어오기 전까지는 상태만 보여 주고 아래 화면은 그리지 않음
+        report_batch_watch()
+        st.stop()
+    elif gen or pending:
         with st.spinner("최종 정리를 생성하는 중..."):
-            data, err, dbg, raw = generate_final_report_json()
-            st.session_state.debug_log = dbg
+            preview = st.empty()
+            data, err, dbg, raw = generate_final_report_json(fresh=gen, on_delta=stream_preview(preview))
+            preview.empty()
+            log_debug(dbg)
             if data is not None:
                 st.session_state.final_report_json = data
-                st.session_state.final_report_raw = raw
+                st.session_state.final_report_raw = pack_text(raw)
             else:
                 st.session_state.final_report_json = None
-                st.session_state.final_report_raw = raw
+                st.session_state.final_report_raw = pack_text(raw)
                 st.error(err or "정리 생성 실패")
 
     data = st.session_state.final_report_json
@@ -2460,12 +3652,11 @@ def render_report() -> None:
                 st.rerun()
 
         st.subheader("공유/저장")
-        export_text = build_report_text_for_export(data)
-        if st.session_state.privacy_mode and st.session_state.mask_export:
-            export_text = mask_text_for_privacy(export_text)
+        mask_export = bool(st.session_state.privacy_mode and st.session_state.mask_export)
+        export_text = report_export_text(data, masked=mask_export)
 
         render_copy_to_clipboard_button(export_text, "리포트 텍스트 복사")
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        ts = now.strftime("%Y%m%d_%H%M%S")
         st.download_button(
             "리포트 .txt 다운로드",
             data=export_text.encode("utf-8"),
@@ -2475,17 +3666,15 @@ def render_report() -> None:
         )
 
         st.subheader("공유용(JSON)")
-        json_text = json.dumps(data, ensure_ascii=False, indent=2)
-        if st.session_state.privacy_mode and st.session_state.mask_export:
-            json_text = mask_text_for_privacy(json_text)
+        json_text = report_json_masked(data) if mask_export else report_json_pretty(data)
         st.code(json_text, language="json")
 
-        valid_until = (datetime.now().date() + timedelta(days=7)).strftime("%Y-%m-%d")
+        valid_until = (now.date() + timedelta(days=7)).strftime("%Y-%m-%d")
         st.divider()
         st.caption(f"이 정리는 **{valid_until}**까지 유효합니다.")
     elif st.session_state.final_report_raw:
         st.warning("JSON 파싱 실패로 원문을 표시합니다.")
-        st.code(st.session_state.final_report_raw, language="text")
+        st.code(get_final_report_raw(), language="text")
 
 
 # =========================